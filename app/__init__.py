@@ -4,8 +4,12 @@ Corona Virus Tracker API
 API for tracking the global coronavirus (COVID-19, SARS-CoV-2) outbreak.
 """
 import logging
+import time
 
 # See PEP396.
 __version__ = "2.0.3"
 
+# Time of the import of the app, to measure how long the workers take to get ready.
+IMPORTED_AT = time.monotonic()
+
 logging.basicConfig(level=logging.INFO)
@@ -1,10 +1,16 @@
 """app.caches.py"""
+import asyncio
+import collections
 import functools
+import hashlib
 import logging
 from typing import Union
 
 import aiocache
+from aiocache.serializers import NullSerializer
+from cachetools.keys import hashkey
 
+from . import codec, shared
 from .config import get_settings
 
 LOGGER = logging.getLogger(name="app.caches")
@@ -18,21 +24,45 @@ else:
     REDIS_URL = SETTINGS.local_redis_url
     LOGGER.info("Using Local Redis")
 
+# Directory of the datasets shared by the processes (memory-mapped), if any.
+SHARED_DATASET_DIR = SETTINGS.shared_dataset_dir
+
+
+# Caches by namespace, with their connections pooled until `close_caches`.
+CACHES = {}
+
 
-@functools.lru_cache()
 def get_cache(namespace) -> Union[aiocache.RedisCache, aiocache.SimpleMemoryCache]:
-    """Retunr """
-    if REDIS_URL:
-        LOGGER.info("using RedisCache")
-        return aiocache.RedisCache(
-            endpoint=REDIS_URL.host,
-            port=REDIS_URL.port,
-            password=REDIS_URL.password,
-            namespace=namespace,
-            create_connection_timeout=5,
-        )
-    LOGGER.info("using SimpleMemoryCache")
-    return aiocache.SimpleMemoryCache(namespace=namespace)
+    """Return the cache of a namespace. Values are stored as is (bytes encoded by `app.codec`)."""
+    cache = CACHES.get(namespace)
+    if cache is None:
+        if REDIS_URL:
+            LOGGER.info("using RedisCache")
+            cache = aiocache.RedisCache(
+                endpoint=REDIS_URL.host,
+                port=REDIS_URL.port,
+                password=REDIS_URL.password,
+                namespace=namespace,
+                create_connection_timeout=5,
+                pool_min_size=SETTINGS.redis_pool_min_size,
+                pool_max_size=SETTINGS.redis_pool_max_size,
+                serializer=NullSerializer(encoding=None),
+            )
+        else:
+            LOGGER.info("using SimpleMemoryCache")
+            cache = aiocache.SimpleMemoryCache(
+                namespace=namespace, serializer=NullSerializer(encoding=None)
+            )
+        CACHES[namespace] = cache
+    return cache
+
+
+async def close_caches():
+    """Close the connections of the caches."""
+    LOGGER.info("Closing caches.")
+    for cache in CACHES.values():
+        await cache.close()
+    CACHES.clear()
 
 
 async def check_cache(data_id: str, namespace: str = None):
@@ -40,13 +70,155 @@ async def check_cache(data_id: str, namespace: str = None):
     cache = get_cache(namespace)
     result = await cache.get(data_id, None)
     LOGGER.info(f"{data_id} cache pulled")
-    await cache.close()
     return result
 
 
+async def check_caches(data_ids, namespace: str = None):
+    """Check the data of a cache given several ids, in a single request.
+
+    :returns: The data (None when missing), in the order of the ids.
+    :rtype: list
+    """
+    cache = get_cache(namespace)
+    results = await cache.multi_get(list(data_ids))
+    LOGGER.info(f"{', '.join(data_ids)} caches pulled")
+    return results
+
+
 async def load_cache(data_id: str, data, namespace: str = None, cache_life: int = 3600):
     """Load data into the cache."""
     cache = get_cache(namespace)
     await cache.set(data_id, data, ttl=cache_life)
     LOGGER.info(f"{data_id} cache loaded")
-    await cache.close()
+
+
+async def load_caches(items, namespace: str = None, cache_life: int = 3600):
+    """Load data into the cache given several ids (a mapping of ids to data), in a single
+    request."""
+    cache = get_cache(namespace)
+    await cache.multi_set(list(items.items()), ttl=cache_life)
+    LOGGER.info(f"{', '.join(items)} caches loaded")
+
+
+# Versions of the datasets this worker last read from or loaded into the caches, by id.
+DATASET_VERSIONS = {}
+
+
+def dataset_version(blob):
+    """Get the version of an encoded dataset (a digest of its bytes)."""
+    return hashlib.blake2b(blob, digest_size=16).digest()
+
+
+def version_id(data_id: str):
+    """Get the id of the version of a dataset."""
+    return f"{data_id}.version"
+
+
+async def check_dataset(data_id: str, namespace: str = None):
+    """Check the dataset (metadata and time series) of a cache given an id. The shared file of
+    the dataset is mapped first, when datasets are shared. The ingest process (which writes the
+    shared files) always misses, so it ingests the dataset rather than reading it back.
+
+    :returns: The decoded dataset, or None when missing or not encoded in the current format.
+    :rtype: Optional[tuple]
+    """
+    if SHARED_DATASET_DIR:
+        if not shared.MAPPED:
+            return None
+        dataset = shared.read_dataset(SHARED_DATASET_DIR, data_id)
+        if dataset is not None:
+            return dataset
+
+    blob = await check_cache(data_id, namespace)
+    if blob is None:
+        return None
+    try:
+        dataset = codec.decode(blob)
+    except codec.DecodeError as err:
+        LOGGER.warning(f"{data_id} cache ignored: {err}")
+        return None
+    DATASET_VERSIONS[data_id] = dataset_version(blob)
+    return dataset
+
+
+async def load_dataset(
+    data_id: str, metadata, series=None, namespace: str = None, cache_life: int = 3600
+):
+    """Load a dataset (metadata and time series) into the cache, along with its version. The
+    shared file of the dataset is written too, when datasets are shared."""
+    if SHARED_DATASET_DIR:
+        shared.write_dataset(SHARED_DATASET_DIR, data_id, metadata, series)
+
+    blob = codec.encode(metadata, series)
+    version = dataset_version(blob)
+    await load_caches({data_id: blob, version_id(data_id): version}, namespace, cache_life)
+    DATASET_VERSIONS[data_id] = version
+
+
+async def changed_datasets(data_ids, namespace: str = None):
+    """Check which datasets were loaded into the cache (e.g. by another worker) since this
+    worker last read or loaded them, in a single request. When datasets are shared, checks
+    which of their files were replaced instead.
+
+    :returns: The ids of the changed datasets.
+    :rtype: list
+    """
+    if SHARED_DATASET_DIR and shared.MAPPED:
+        return shared.changed_datasets(SHARED_DATASET_DIR, data_ids)
+
+    versions = await check_caches([version_id(data_id) for data_id in data_ids], namespace)
+    return [
+        data_id
+        for data_id, version in zip(data_ids, versions)
+        if version is not None and version != DATASET_VERSIONS.get(data_id)
+    ]
+
+
+# Number of calls made and of callers coalesced into an in-flight call, by function.
+SINGLEFLIGHT_STATS = collections.defaultdict(collections.Counter)
+
+
+def singleflight(func):
+    """
+    Coalesce concurrent calls of a coroutine function made with the same arguments.
+    Callers arriving while a call is in flight await its result instead of making their own.
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+    in_flight = {}
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        key = hashkey(*args, **kwargs)
+        future = in_flight.get(key)
+        if future is None:
+            SINGLEFLIGHT_STATS[name]["calls"] += 1
+            future = in_flight[key] = asyncio.ensure_future(func(*args, **kwargs))
+            future.add_done_callback(lambda _: in_flight.pop(key, None))
+        else:
+            SINGLEFLIGHT_STATS[name]["coalesced"] += 1
+            LOGGER.debug(f"{name}{key} coalesced into in-flight call")
+        # Shielded, so a cancelled caller does not cancel the call for the others.
+        return await asyncio.shield(future)
+
+    return wrapper
+
+
+def cached_value(cache, *args, **kwargs):
+    """
+    Get the value of an `asyncache.cached` coroutine function currently in the cache (e.g. to
+    keep it when the upstream data was not modified), without computing it.
+
+    :returns: The value, or None when not cached (or expired).
+    """
+    return cache.get(hashkey(*args, **kwargs))
+
+
+async def refresh_cached(func, cache, *args, **kwargs):
+    """
+    Recompute the value of an `asyncache.cached` coroutine function, bypassing the cache, and
+    swap it into the cache (resetting its lifetime). Until then, callers keep getting the
+    previous value.
+    """
+    value = await func.__wrapped__(*args, **kwargs)
+    cache[hashkey(*args, **kwargs)] = value
+    return value
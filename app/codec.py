@@ -0,0 +1,113 @@
+"""app.codec.py"""
+import json
+import struct
+import sys
+import zlib
+from array import array
+
+from .timeseries import TYPECODE, TimeSeries
+
+# Marker starting every encoded dataset.
+MAGIC = b"CTDS"
+
+# Version of the format, bumped on every incompatible change.
+VERSION = 2
+
+# Prefix of an encoded dataset: magic, version and whether the payload is compressed (padded
+# so that an uncompressed payload starts aligned).
+PREFIX = struct.Struct("<4sB?xx")
+
+# Length of the (JSON) document starting the compressed payload.
+DOCUMENT_LENGTH = struct.Struct("<I")
+
+# zlib compression level of the payload.
+COMPRESSION_LEVEL = 6
+
+
+class DecodeError(ValueError):
+    """
+    Raised when a blob is not a dataset encoded in the current format.
+    """
+
+
+def encode(metadata, series=None, compress=True):
+    """
+    Encodes a dataset: JSON serializable metadata, along with a time series.
+
+    The layout is the prefix, followed by the payload (zlib compressed, unless `compress` is
+    false): the length of a JSON document (metadata, date axis, size and categories of the
+    series), the document, then the matrix of every category as little-endian 32 bit integers
+    (aligned on 4 bytes).
+
+    :returns: The encoded dataset.
+    :rtype: bytes
+    """
+    document = {"metadata": metadata}
+    columns = []
+    if series is not None:
+        document.update(dates=series.dates, size=series.size, categories=series.categories)
+        for category in series.categories:
+            column = series.columns[category]
+            if sys.byteorder == "big":  # pragma: no cover
+                column = array(TYPECODE, column)
+                column.byteswap()
+            columns.append(column.tobytes())
+
+    encoded = json.dumps(document, separators=(",", ":")).encode("utf-8")
+    padding = b"\0" * (-(DOCUMENT_LENGTH.size + len(encoded)) % 4)
+    payload = b"".join([DOCUMENT_LENGTH.pack(len(encoded)), encoded, padding, *columns])
+    if compress:
+        payload = zlib.compress(payload, COMPRESSION_LEVEL)
+    return PREFIX.pack(MAGIC, VERSION, compress) + payload
+
+
+def decode(blob, copy=True):
+    """
+    Decodes a dataset encoded by `encode`.
+
+    :param blob: The encoded dataset (any buffer, e.g. a memory-mapped file).
+    :param copy: Whether to copy the matrices instead of viewing them in the (read-only)
+                 payload, e.g. zero-copy in the memory-mapped file of an uncompressed dataset.
+    :returns: The metadata and the time series (None if the dataset has none).
+    :rtype: tuple
+    :raises DecodeError: When the blob is not a dataset encoded in the current format.
+    """
+    if len(blob) < PREFIX.size:
+        raise DecodeError("Not an encoded dataset")
+    magic, version, compressed = PREFIX.unpack_from(blob)
+    if magic != MAGIC:
+        raise DecodeError("Not an encoded dataset")
+    if version != VERSION:
+        raise DecodeError(f"Unsupported dataset version {version} (expected {VERSION})")
+
+    try:
+        if compressed:
+            payload = memoryview(zlib.decompress(memoryview(blob)[PREFIX.size :]))
+        else:
+            payload = memoryview(blob)[PREFIX.size :]
+        (length,) = DOCUMENT_LENGTH.unpack_from(payload)
+        offset = DOCUMENT_LENGTH.size + length
+        document = json.loads(bytes(payload[DOCUMENT_LENGTH.size : offset]).decode("utf-8"))
+    except (zlib.error, struct.error, ValueError) as err:
+        raise DecodeError(f"Corrupted dataset: {err}") from err
+
+    if "dates" not in document:
+        return document["metadata"], None
+
+    offset += -offset % 4
+    size = document["size"] * len(document["dates"]) * array(TYPECODE).itemsize
+    columns = {}
+    for category in document["categories"]:
+        column = payload[offset : offset + size]
+        if len(column) != size:
+            raise DecodeError(f"Corrupted dataset: truncated `{category}` matrix")
+        if copy or sys.byteorder == "big":
+            # Copy the matrix out of the payload (one memcpy).
+            matrix = array(TYPECODE)
+            matrix.frombytes(column)
+            if sys.byteorder == "big":  # pragma: no cover
+                matrix.byteswap()
+            column = matrix
+        columns[category] = column
+        offset += size
+    return document["metadata"], TimeSeries(document["dates"], columns, document["size"])
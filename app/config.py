@@ -11,6 +11,19 @@ class _Settings(BaseSettings):
     port: int = 5000
     rediscloud_url: AnyUrl = None
     local_redis_url: AnyUrl = None
+    # Connections to Redis kept open by every cache.
+    redis_pool_min_size: int = 1
+    redis_pool_max_size: int = 10
+    # Fetch only the rows appended to the NYT dataset since the last ingest.
+    nyt_incremental_ingest: bool = True
+    # Directory of the datasets written by the ingest process (`python -m app.ingest`) and
+    # memory-mapped by the API workers.
+    shared_dataset_dir: str = None
+    # Fetch fresh populations from the GeoNames in the background (the bundled ones are used until
+    # then).
+    refresh_populations: bool = True
+    # Encode the v2 responses straight from the locations, without validating them.
+    fast_json_responses: bool = False
     # Scout APM
     scout_name: str = None
     # Sentry
@@ -0,0 +1,64 @@
+"""
+app.ingest.py
+
+Ingest process of the shared datasets: refreshes the data-sources and writes their datasets to
+`SHARED_DATASET_DIR`, where the API workers map them (instead of each ingesting its own copy).
+
+Usage:
+    SHARED_DATASET_DIR=/dev/shm/coronavirus-tracker python -m app.ingest
+"""
+import asyncio
+import logging
+
+from . import shared
+from .caches import SHARED_DATASET_DIR, close_caches
+from .data import DATA_SOURCES
+from .scheduler import REFRESH_INTERVAL
+from .utils.httputils import setup_client_session, teardown_client_session
+
+LOGGER = logging.getLogger(__name__)
+
+
+async def ingest():
+    """
+    Refresh every data-source, writing its datasets.
+    """
+    for name, service in DATA_SOURCES.items():
+        LOGGER.info(f"{name} ingesting...")
+        try:
+            await service.refresh()
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception(f"{name} ingest failed")
+        else:
+            LOGGER.info(f"{name} ingested")
+
+
+async def ingest_forever(interval=REFRESH_INTERVAL):
+    """
+    Ingest the data-sources every `interval` seconds.
+    """
+    await setup_client_session()
+    try:
+        while True:
+            await ingest()
+            await asyncio.sleep(interval)
+    finally:
+        await teardown_client_session()
+        await close_caches()
+
+
+def main():
+    """
+    Run the ingest process.
+    """
+    logging.basicConfig(level=logging.INFO)
+    if not SHARED_DATASET_DIR:
+        raise SystemExit("SHARED_DATASET_DIR is not set.")
+
+    # Ingest (and write) the datasets, rather than mapping the ones written previously.
+    shared.MAPPED = False
+    asyncio.get_event_loop().run_until_complete(ingest_forever())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 """app.location"""
 from ..coordinates import Coordinates
+from ..timeseries import CUMULATIVE
 from ..utils import countries
+from ..utils import date as date_util
 from ..utils.populations import country_population
 
 
@@ -10,6 +12,20 @@ class Location:  # pylint: disable=too-many-instance-attributes
     A location in the world affected by the coronavirus.
     """
 
+    __slots__ = (
+        "id",
+        "country",
+        "country_code",
+        "country_population",
+        "province",
+        "latitude",
+        "longitude",
+        "last_updated",
+        "confirmed",
+        "deaths",
+        "recovered",
+    )
+
     def __init__(
         self, id, country, province, coordinates, last_updated, confirmed, deaths, recovered,
     ):  # pylint: disable=too-many-arguments
@@ -17,7 +33,17 @@ class Location:  # pylint: disable=too-many-instance-attributes
         self.id = id
         self.country = country.strip()
         self.province = province.strip()
-        self.coordinates = coordinates
+
+        # Alpha-2 code represention of the country ('XX' if none is found) and its population,
+        # resolved once.
+        self.country_code = (
+            countries.country_code(self.country) or countries.DEFAULT_COUNTRY_CODE
+        ).upper()
+        self.country_population = country_population(self.country_code)
+
+        # Coordinates (as provided by the source).
+        self.latitude = coordinates.latitude
+        self.longitude = coordinates.longitude
 
         # Last update.
         self.last_updated = last_updated
@@ -28,24 +54,14 @@ class Location:  # pylint: disable=too-many-instance-attributes
         self.recovered = recovered
 
     @property
-    def country_code(self):
-        """
-        Gets the alpha-2 code represention of the country. Returns 'XX' if none is found.
-
-        :returns: The country code.
-        :rtype: str
-        """
-        return (countries.country_code(self.country) or countries.DEFAULT_COUNTRY_CODE).upper()
-
-    @property
-    def country_population(self):
+    def coordinates(self):
         """
-        Gets the population of this location.
+        Gets the coordinates of this location.
 
-        :returns: The population.
-        :rtype: int
+        :returns: The coordinates.
+        :rtype: Coordinates
         """
-        return country_population(self.country_code)
+        return Coordinates(self.latitude, self.longitude)
 
     def serialize(self):
         """
@@ -62,7 +78,7 @@ class Location:  # pylint: disable=too-many-instance-attributes
             "country_population": self.country_population,
             "province": self.province,
             # Coordinates.
-            "coordinates": self.coordinates.serialize(),
+            "coordinates": {"latitude": self.latitude, "longitude": self.longitude},
             # Last updated.
             "last_updated": self.last_updated,
             # Latest data (statistics).
@@ -79,6 +95,8 @@ class TimelinedLocation(Location):
     A location with timelines.
     """
 
+    __slots__ = ("timelines",)
+
     # pylint: disable=too-many-arguments
     def __init__(self, id, country, province, coordinates, last_updated, timelines):
         super().__init__(
@@ -97,12 +115,35 @@ class TimelinedLocation(Location):
         # Set timelines.
         self.timelines = timelines
 
+    def view_timelines(
+        self, start=None, end=None, resolution=date_util.DAILY, derivation=CUMULATIVE
+    ):
+        """
+        Gets the timelines (or a series derived from them) restricted to the days from `start` to
+        `end` (inclusive), at a resolution.
+
+        :param start: First day of the timelines (defaults to their first one).
+        :param end: Last day of the timelines (defaults to their last one).
+        :param resolution: Resolution of the timelines (`daily`, `weekly` or `monthly`).
+        :param derivation: Series of the timelines (`cumulative`, `new`, `rolling7` or
+                           `growth_rate`).
+        :returns: The timelines.
+        :rtype: dict
+        """
+        if (start, end, resolution, derivation) == (None, None, date_util.DAILY, CUMULATIVE):
+            return self.timelines
+        return {
+            key: value.derive(derivation).between(start, end).resample(resolution)
+            for (key, value) in self.timelines.items()
+        }
+
     # pylint: disable=arguments-differ
-    def serialize(self, timelines=False):
+    def serialize(self, timelines=False, **view):
         """
         Serializes the location into a dict.
 
         :param timelines: Whether to include the timelines.
+        :param view: Restriction of the included timelines (as `view_timelines`).
         :returns: The serialized location.
         :rtype: dict
         """
@@ -115,7 +156,7 @@ class TimelinedLocation(Location):
                     "timelines": {
                         # Serialize all the timelines.
                         key: value.serialize()
-                        for (key, value) in self.timelines.items()
+                        for (key, value) in self.view_timelines(**view).items()
                     }
                 }
             )
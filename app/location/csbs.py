@@ -7,6 +7,8 @@ class CSBSLocation(Location):
     A CSBS (county) location.
     """
 
+    __slots__ = ("state", "county")
+
     # pylint: disable=too-many-arguments,redefined-builtin
     def __init__(self, id, state, county, coordinates, last_updated, confirmed, deaths):
         super().__init__(
@@ -25,7 +27,8 @@ class CSBSLocation(Location):
         self.state = state
         self.county = county
 
-    def serialize(self, timelines=False):  # pylint: disable=arguments-differ,unused-argument
+    # pylint: disable=arguments-differ,unused-argument
+    def serialize(self, timelines=False, **view):
         """
         Serializes the location into a dict.
 
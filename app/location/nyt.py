@@ -7,6 +7,8 @@ class NYTLocation(TimelinedLocation):
     A NYT (county) Timelinedlocation.
     """
 
+    __slots__ = ("state", "county")
+
     # pylint: disable=too-many-arguments,redefined-builtin
     def __init__(self, id, state, county, coordinates, last_updated, timelines):
         super().__init__(id, "US", state, coordinates, last_updated, timelines)
@@ -14,14 +16,15 @@ class NYTLocation(TimelinedLocation):
         self.state = state
         self.county = county
 
-    def serialize(self, timelines=False):  # pylint: disable=arguments-differ,unused-argument
+    # pylint: disable=arguments-differ,unused-argument
+    def serialize(self, timelines=False, **view):
         """
         Serializes the location into a dict.
 
         :returns: The serialized location.
         :rtype: dict
         """
-        serialized = super().serialize(timelines)
+        serialized = super().serialize(timelines, **view)
 
         # Update with new fields.
         serialized.update(
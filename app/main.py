@@ -13,9 +13,12 @@ from fastapi.responses import JSONResponse
 from scout_apm.async_.starlette import ScoutMiddleware
 from sentry_sdk.integrations.asgi import SentryAsgiMiddleware
 
+from . import scheduler
+from .caches import close_caches
 from .config import get_settings
 from .data import data_source
 from .routers import V1, V2
+from .scheduler import start_refresh_scheduler, stop_refresh_scheduler
 from .utils.httputils import setup_client_session, teardown_client_session
 
 # ############
@@ -37,8 +40,8 @@ APP = FastAPI(
     version="2.0.4",
     docs_url="/",
     redoc_url="/docs",
-    on_startup=[setup_client_session],
-    on_shutdown=[teardown_client_session],
+    on_startup=[setup_client_session, start_refresh_scheduler],
+    on_shutdown=[stop_refresh_scheduler, teardown_client_session, close_caches],
 )
 
 # #####################
@@ -114,6 +117,16 @@ APP.include_router(V1, prefix="", tags=["v1"])
 APP.include_router(V2, prefix="/v2", tags=["v2"])
 
 
+@APP.get("/ready", include_in_schema=False)
+async def ready():
+    """
+    Readiness probe, failing until the data-sources are warmed up.
+    """
+    if not scheduler.READY:
+        return JSONResponse({"ready": False}, status_code=503)
+    return {"ready": True}
+
+
 # Running of app.
 if __name__ == "__main__":
     uvicorn.run(
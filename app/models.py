@@ -1,7 +1,10 @@
 """app.models.py"""
-from typing import Dict, List
+from typing import Dict, List, Union
 
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, PrivateAttr, StrictInt, validator
+
+from .timeseries import CUMULATIVE, DERIVATIONS, MISSING, NEW
+from .utils import date as date_util
 
 
 class Latest(BaseModel):
@@ -27,7 +30,11 @@ class Timeline(BaseModel):
     Timeline model.
     """
 
-    timeline: Dict[str, int] = {}
+    # Counts, or rates of the derived series.
+    timeline: Dict[str, Union[StrictInt, float]] = {}
+
+    # What the timeline holds, the reported cumulative counts or a series derived from them.
+    _derivation: str = PrivateAttr(default=CUMULATIVE)
 
     @validator("timeline")
     @classmethod
@@ -40,6 +47,66 @@ class Timeline(BaseModel):
         """Get latest available history value."""
         return list(self.timeline.values())[-1] if self.timeline else 0
 
+    def derive(self, derivation):
+        """
+        Gets a series derived from the cumulative counts of the timeline (e.g. the new cases of
+        every day), treating its dates as consecutive days.
+
+        :returns: The timeline.
+        :rtype: Timeline
+        """
+        if derivation == CUMULATIVE:
+            return self
+        derived = DERIVATIONS[derivation][0](list(self.timeline.values()))
+        timeline = self.copy(
+            update={
+                "timeline": {
+                    date: amount
+                    for date, amount in zip(self.timeline, derived)
+                    if amount != MISSING
+                }
+            }
+        )
+        timeline._derivation = derivation  # pylint: disable=protected-access
+        return timeline
+
+    def resample(self, resolution):
+        """
+        Gets the new cases (of a `new` timeline) or the last value of every period (week or
+        month) of the timeline, keyed by its last date.
+
+        :returns: The timeline.
+        :rtype: Timeline
+        """
+        if resolution == date_util.DAILY:
+            return self
+        period = date_util.PERIODS[resolution]
+        last = {}
+        for date, amount in self.timeline.items():
+            key = period(date)
+            if self._derivation == NEW and key in last:
+                amount += last[key][1]
+            last[key] = (date, amount)
+        return self.copy(update={"timeline": dict(last.values())})
+
+    def between(self, start=None, end=None):
+        """
+        Gets the timeline restricted to the days from `start` to `end` (inclusive).
+
+        :returns: The timeline.
+        :rtype: Timeline
+        """
+        lower, upper = date_util.iso_bounds(start, end)
+        return self.copy(
+            update={
+                "timeline": {
+                    date: amount
+                    for date, amount in self.timeline.items()
+                    if (lower is None or date >= lower) and (upper is None or date < upper)
+                }
+            }
+        )
+
     def serialize(self):
         """
         Serialize the model into dict
@@ -1,7 +1,8 @@
 """app.routers.v1.py"""
 from fastapi import APIRouter
 
-from ..services.location.jhu import get_category
+from ..services.location.jhu import get_category, restore_category
+from ..utils import httputils
 
 V1 = APIRouter()
 
@@ -9,9 +10,12 @@ V1 = APIRouter()
 @V1.get("/all")
 async def all_categories():
     """Get all the categories."""
-    confirmed = await get_category("confirmed")
-    deaths = await get_category("deaths")
-    recovered = await get_category("recovered")
+    confirmed, deaths, recovered = (
+        restore_category(*category)
+        for category in await httputils.gather(
+            get_category("confirmed"), get_category("deaths"), get_category("recovered")
+        )
+    )
 
     return {
         # Data.
@@ -30,7 +34,7 @@ async def all_categories():
 @V1.get("/confirmed")
 async def get_confirmed():
     """Confirmed cases."""
-    confirmed_data = await get_category("confirmed")
+    confirmed_data = restore_category(*await get_category("confirmed"))
 
     return confirmed_data
 
@@ -38,7 +42,7 @@ async def get_confirmed():
 @V1.get("/deaths")
 async def get_deaths():
     """Total deaths."""
-    deaths_data = await get_category("deaths")
+    deaths_data = restore_category(*await get_category("deaths"))
 
     return deaths_data
 
@@ -46,6 +50,6 @@ async def get_deaths():
 @V1.get("/recovered")
 async def get_recovered():
     """Recovered cases."""
-    recovered_data = await get_category("recovered")
+    recovered_data = restore_category(*await get_category("recovered"))
 
     return recovered_data
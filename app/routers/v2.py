@@ -1,13 +1,39 @@
 """app.routers.v2"""
+import datetime
 import enum
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
+from ..config import get_settings
 from ..data import DATA_SOURCES
-from ..models import LatestResponse, LocationResponse, LocationsResponse
+from ..models import LatestResponse, Location, LocationResponse, LocationsResponse
+from ..timeseries import CUMULATIVE, GROWTH_RATE, NEW, ROLLING7
+from ..utils import date as date_util
+from ..utils import fastjson
 
 V2 = APIRouter()
 
+SETTINGS = get_settings()
+
+# Query parameters of the locations which are not filters.
+RESERVED_PARAMS = (
+    "source",
+    "timelines",
+    "from",
+    "to",
+    "resolution",
+    "series",
+    "limit",
+    "offset",
+    "fields",
+)
+
+# Maximum number of timeline cells (dates of the timelines of every location) in a cached
+# response, the responses with more of them are streamed while they are encoded instead.
+MAX_CACHED_CELLS = 100_000
+
 
 class Sources(str, enum.Enum):
     """
@@ -19,6 +45,27 @@ class Sources(str, enum.Enum):
     NYT = "nyt"
 
 
+class Resolution(str, enum.Enum):
+    """
+    A resolution of the timelines.
+    """
+
+    DAILY = date_util.DAILY
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+
+
+class Series(str, enum.Enum):
+    """
+    A series of the timelines, the reported cumulative counts or a series derived from them.
+    """
+
+    CUMULATIVE = CUMULATIVE
+    NEW = NEW
+    ROLLING7 = ROLLING7
+    GROWTH_RATE = GROWTH_RATE
+
+
 @V2.get("/latest", response_model=LatestResponse)
 async def get_latest(
     request: Request, source: Sources = Sources.JHU
@@ -26,17 +73,15 @@ async def get_latest(
     """
     Getting latest amount of total confirmed cases, deaths, and recoveries.
     """
-    locations = await request.state.source.get_all()
-    return {
-        "latest": {
-            "confirmed": sum(map(lambda location: location.confirmed, locations)),
-            "deaths": sum(map(lambda location: location.deaths, locations)),
-            "recovered": sum(map(lambda location: location.recovered, locations)),
-        }
-    }
+    snapshot = await request.state.source.get_snapshot()
+    latest = snapshot.latest
 
+    if SETTINGS.fast_json_responses:
+        return Response(fastjson.encode_latest_response(latest), media_type="application/json")
+    return {"latest": latest}
 
-# pylint: disable=unused-argument,too-many-arguments,redefined-builtin
+
+# pylint: disable=unused-argument,too-many-arguments,too-many-locals,redefined-builtin
 @V2.get("/locations", response_model=LocationsResponse, response_model_exclude_unset=True)
 async def get_locations(
     request: Request,
@@ -45,61 +90,137 @@ async def get_locations(
     province: str = None,
     county: str = None,
     timelines: bool = False,
+    from_: datetime.date = Query(None, alias="from"),
+    to_: datetime.date = Query(None, alias="to"),
+    resolution: Resolution = Resolution.DAILY,
+    series: Series = Series.CUMULATIVE,
+    limit: int = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    fields: str = None,
 ):
     """
-    Getting the locations.
+    Getting the locations (with their timelines restricted to the days `from` - `to`, at a
+    daily, weekly or monthly resolution, as cumulative counts or a series derived from them).
+
+    The locations can be paginated with `limit` and `offset` (the latest amounts are still the
+    totals of every location), and restricted to some comma-separated `fields`.
     """
     # All query paramameters.
     params = dict(request.query_params)
 
     # Remove reserved params.
-    params.pop("source", None)
-    params.pop("timelines", None)
-
-    # Retrieve all the locations.
-    locations = await request.state.source.get_all()
-
-    # Attempt to filter out locations with properties matching the provided query params.
-    for key, value in params.items():
-        # Clean keys for security purposes.
-        key = key.lower()
-        value = value.lower().strip("__")
-
-        # Do filtering.
-        try:
-            locations = [
-                location
-                for location in locations
-                if str(getattr(location, key)).lower() == str(value)
-            ]
-        except AttributeError:
-            pass
-        if not locations:
+    for reserved in RESERVED_PARAMS:
+        params.pop(reserved, None)
+
+    # Fields of the locations to encode.
+    fields = parse_fields(fields)
+    if fields is not None:
+        timelines = timelines and "timelines" in fields
+
+    # Clean keys for security purposes.
+    filters = tuple(
+        sorted((key.lower(), value.lower().strip("__")) for key, value in params.items())
+    )
+
+    # Serve the encoded response, unless the locations were swapped since it was cached.
+    snapshot = await request.state.source.get_snapshot()
+    filters = snapshot.normalize(filters)
+    view = {"start": from_, "end": to_, "resolution": resolution.value, "derivation": series.value}
+    cache_key = (timelines, *view.values(), limit, offset, fields, filters)
+    body = snapshot.responses.get(cache_key)
+    if body is None:
+        # Filter out locations with properties matching the provided query params.
+        locations = snapshot.filter(filters)
+        if filters and not locations:
             raise HTTPException(
                 404, detail=f"Source `{source}` does not have the desired location data.",
             )
 
-    # Return final serialized data.
-    return {
-        "latest": {
-            "confirmed": sum(map(lambda location: location.confirmed, locations)),
-            "deaths": sum(map(lambda location: location.deaths, locations)),
-            "recovered": sum(map(lambda location: location.recovered, locations)),
-        },
-        "locations": [location.serialize(timelines) for location in locations],
-    }
+        latest = snapshot.latest_of(filters, locations)
+
+        # Requested page.
+        locations = paginate(locations, limit, offset)
+
+        # Final serialized data.
+        if SETTINGS.fast_json_responses:
+            chunks = fastjson.iter_locations_response(latest, locations, timelines, fields, **view)
+        else:
+            chunks = iter_locations_response(latest, locations, timelines, fields, view)
+
+        # Do not build (and keep) the large bodies in memory.
+        if timelines and timeline_cells(locations, view) > MAX_CACHED_CELLS:
+            return StreamingResponse(chunks, media_type="application/json")
+
+        body = b"".join(chunks)
+        snapshot.cache_response(cache_key, body)
+
+    return Response(body, media_type="application/json")
+
+
+def parse_fields(fields):
+    """
+    Parses the comma-separated fields of the locations to encode.
+
+    :returns: The fields, or None for every field (also when no field is named).
+    :rtype: Optional[frozenset]
+    """
+    fields = frozenset(filter(None, (field.strip() for field in (fields or "").split(","))))
+    if not fields:
+        return None
+    unknown = fields.difference(fastjson.LOCATION_FIELDS)
+    if unknown:
+        raise HTTPException(422, detail=f"Unknown fields: {', '.join(sorted(unknown))}.")
+    return fields
+
+
+def paginate(locations, limit=None, offset=0):
+    """
+    Gets a page of the locations, of at most `limit` locations from `offset`.
+
+    :returns: The locations of the page.
+    :rtype: list
+    """
+    return locations[offset : None if limit is None else offset + limit]
+
+
+def timeline_cells(locations, view):
+    """
+    Estimates the number of timeline cells encoded for the locations, from the viewed cells of
+    the first one (the timelines of a data-source share their dates).
+
+    :returns: The number of cells.
+    :rtype: int
+    """
+    if not locations or not hasattr(locations[0], "timelines"):
+        return 0
+    timelines = locations[0].view_timelines(**view)
+    return len(locations) * sum(len(timeline.timeline) for timeline in timelines.values())
 
 
 # pylint: disable=invalid-name
 @V2.get("/locations/{id}", response_model=LocationResponse)
 async def get_location_by_id(
-    request: Request, id: int, source: Sources = Sources.JHU, timelines: bool = True
+    request: Request,
+    id: int,
+    source: Sources = Sources.JHU,
+    timelines: bool = True,
+    from_: datetime.date = Query(None, alias="from"),
+    to_: datetime.date = Query(None, alias="to"),
+    resolution: Resolution = Resolution.DAILY,
+    series: Series = Series.CUMULATIVE,
 ):
     """
-    Getting specific location by id.
+    Getting specific location by id (with its timelines restricted to the days `from` - `to`,
+    at a daily, weekly or monthly resolution, as cumulative counts or a series derived from
+    them).
     """
     location = await request.state.source.get(id)
-    return {"location": location.serialize(timelines)}
+    view = {"start": from_, "end": to_, "resolution": resolution.value, "derivation": series.value}
+
+    if SETTINGS.fast_json_responses:
+        body = fastjson.encode_location_response(location, timelines, **view)
+        return Response(body, media_type="application/json")
+    return {"location": location.serialize(timelines, **view)}
 
 
 @V2.get("/sources")
@@ -108,3 +229,44 @@ async def sources():
     Retrieves a list of data-sources that are availble to use.
     """
     return {"sources": list(DATA_SOURCES.keys())}
+
+
+def encode_response(model, content, exclude_unset=False, include=None):
+    """
+    Encodes a response body the way FastAPI does for a route returning `content`, with `model`
+    as `response_model` (and `exclude_unset` as `response_model_exclude_unset`).
+
+    :param include: Fields of the model to encode (defaults to all of them).
+    :returns: The JSON body.
+    :rtype: bytes
+    """
+    return JSONResponse(
+        jsonable_encoder(model(**content), include=include, exclude_unset=exclude_unset)
+    ).body
+
+
+def iter_locations_response(latest, locations, timelines, fields, view):
+    """
+    Encodes a body of `LocationsResponse` (excluding the unset fields) in chunks of locations, as
+    `encode_response` does for the whole body.
+
+    :returns: The chunks of the JSON body.
+    :rtype: Iterator[bytes]
+    """
+    # The encoded latest amounts, without the closing brace.
+    yield encode_response(LatestResponse, {"latest": latest})[:-1] + b',"locations":['
+    chunk_size = fastjson.CHUNK_LOCATIONS
+    for start in range(0, len(locations), chunk_size):
+        encoded = b",".join(
+            [
+                encode_response(
+                    Location,
+                    location.serialize(timelines, **view),
+                    exclude_unset=True,
+                    include=fields,
+                )
+                for location in locations[start : start + chunk_size]
+            ]
+        )
+        yield (b"," if start else b"") + encoded
+    yield b"]}"
@@ -0,0 +1,141 @@
+"""app.scheduler.py"""
+import asyncio
+import logging
+import random
+import time
+
+from . import IMPORTED_AT, caches
+from .config import get_settings
+from .data import DATA_SOURCES
+from .utils import httputils, populations
+
+LOGGER = logging.getLogger(__name__)
+
+SETTINGS = get_settings()
+
+# Seconds between two refreshes of a data-source (the cached data lives for 30 minutes).
+REFRESH_INTERVAL = 25 * 60
+
+# Maximum random amount of seconds taken off every interval, so the sources (and the workers)
+# do not all refresh at once.
+REFRESH_JITTER = 2 * 60
+
+# Seconds between two checks for datasets loaded into the shared cache by other workers.
+SYNC_INTERVAL = 30
+
+# Seconds between two attempts at warming up the data-sources which failed to load at startup.
+WARM_UP_RETRY_INTERVAL = 10
+
+# Running refresh tasks.
+TASKS = []
+
+# Whether the snapshots of every data-source are loaded (the worker can serve requests).
+READY = False
+
+
+async def start_refresh_scheduler():
+    """
+    Start refreshing every data-source in the background, before its cached data expires.
+    """
+    LOGGER.info("Starting refresh scheduler.")
+    TASKS.append(asyncio.ensure_future(warm_up(DATA_SOURCES)))
+    for name, service in DATA_SOURCES.items():
+        TASKS.append(asyncio.ensure_future(refresh_forever(name, service)))
+    TASKS.append(asyncio.ensure_future(sync_forever(DATA_SOURCES)))
+    if SETTINGS.refresh_populations:
+        TASKS.append(asyncio.ensure_future(populations.refresh_populations()))
+
+
+async def stop_refresh_scheduler():
+    """
+    Stop the background refreshes.
+    """
+    LOGGER.info("Stopping refresh scheduler.")
+    for task in TASKS:
+        task.cancel()
+    await asyncio.gather(*TASKS, return_exceptions=True)
+    TASKS.clear()
+
+
+async def warm_up(services, retry_interval=WARM_UP_RETRY_INTERVAL):
+    """
+    Load the snapshots of the data-sources concurrently, retrying the ones which fail, and mark
+    the worker as ready once they are all loaded.
+    """
+    global READY  # pylint: disable=global-statement
+    pending = dict(services)
+    while True:
+        names = list(pending)
+        loaded = await httputils.gather(*(load_snapshot(name, pending[name]) for name in names))
+        for name, success in zip(names, loaded):
+            if success:
+                del pending[name]
+        if not pending:
+            break
+        await asyncio.sleep(retry_interval)
+
+    READY = True
+    LOGGER.info(f"Ready {time.monotonic() - IMPORTED_AT:.2f}s after import.")
+
+
+async def load_snapshot(name, service):
+    """
+    Load the snapshot of a data-source.
+
+    :returns: Whether the snapshot was loaded.
+    :rtype: bool
+    """
+    LOGGER.info(f"{name} warming up...")
+    try:
+        await service.get_snapshot()
+    except Exception:  # pylint: disable=broad-except
+        LOGGER.exception(f"{name} warm-up failed")
+        return False
+    LOGGER.info(f"{name} warmed up")
+    return True
+
+
+async def refresh_forever(name, service, interval=REFRESH_INTERVAL, jitter=REFRESH_JITTER):
+    """
+    Refresh a data-source every `interval` (minus jitter) seconds. The previous data keeps being
+    served while a refresh runs, or when it fails.
+    """
+    while True:
+        await asyncio.sleep(interval - random.uniform(0, jitter))
+        LOGGER.info(f"{name} refreshing...")
+        try:
+            await service.refresh()
+            # Build the snapshot (and its indexes) of the new data ahead of the requests.
+            await service.get_snapshot()
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception(f"{name} refresh failed")
+        else:
+            LOGGER.info(f"{name} refreshed")
+
+
+async def sync_forever(services, interval=SYNC_INTERVAL):
+    """
+    Check every `interval` seconds for datasets of the data-sources loaded into the shared cache
+    by other workers, and swap them in.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await sync_datasets(services)
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception("datasets sync failed")
+
+
+async def sync_datasets(services):
+    """
+    Swap in the datasets of the data-sources loaded into the shared cache by other workers,
+    without ingesting them again.
+    """
+    data_ids = [data_id for service in services.values() for data_id in service.data_ids]
+    changed = set(await caches.changed_datasets(data_ids))
+    for name, service in services.items():
+        if changed.intersection(service.data_ids):
+            LOGGER.info(f"{name} changed in the shared cache, swapping it in...")
+            # Refreshing reads the shared cache first.
+            await service.refresh()
+            await service.get_snapshot()
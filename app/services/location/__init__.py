@@ -1,12 +1,20 @@
 """app.services.location"""
 from abc import ABC, abstractmethod
 
+from ...snapshot import Snapshot
+
 
 class LocationService(ABC):
     """
     Service for retrieving locations.
     """
 
+    # Ids of the datasets of the service in the shared cache.
+    data_ids = ()
+
+    # Snapshot of the current locations.
+    _snapshot = None
+
     @abstractmethod
     async def get_all(self):
         """
@@ -26,3 +34,22 @@ class LocationService(ABC):
         :rtype: Location
         """
         raise NotImplementedError
+
+    @abstractmethod
+    async def refresh(self):
+        """
+        Rebuilds the locations in the background and swaps them in, once ready.
+        """
+        raise NotImplementedError
+
+    async def get_snapshot(self):
+        """
+        Gets the snapshot of the current locations, built again once they are swapped.
+
+        :returns: The snapshot.
+        :rtype: Snapshot
+        """
+        locations = await self.get_all()
+        if self._snapshot is None or self._snapshot.locations is not locations:
+            self._snapshot = Snapshot(locations)
+        return self._snapshot
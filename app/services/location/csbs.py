@@ -1,15 +1,15 @@
 """app.services.location.csbs.py"""
-import csv
 import logging
 from datetime import datetime
 
 from asyncache import cached
 from cachetools import TTLCache
 
-from ...caches import check_cache, load_cache
+from ...caches import cached_value, check_dataset, load_dataset, refresh_cached, singleflight
 from ...coordinates import Coordinates
 from ...location.csbs import CSBSLocation
 from ...utils import httputils
+from ...utils.csvschema import CSVSchema
 from . import LocationService
 
 LOGGER = logging.getLogger("services.location.csbs")
@@ -20,6 +20,8 @@ class CSBSLocationService(LocationService):
     Service for retrieving locations from csbs
     """
 
+    data_ids = ("csbs.locations",)
+
     async def get_all(self):
         # Get the locations.
         locations = await get_locations()
@@ -30,12 +32,111 @@ class CSBSLocationService(LocationService):
         locations = await self.get_all()
         return locations[loc_id]
 
+    async def refresh(self):
+        await refresh_cached(get_locations, LOCATIONS_CACHE)
+
 
 # Base URL for fetching data
 BASE_URL = "https://facts.csbs.org/covid-19/covid19_county.csv"
 
+# Local cache of the locations.
+LOCATIONS_CACHE = TTLCache(maxsize=1, ttl=1800)
+
+
+async def parse_locations(response):
+    """
+    Parses and normalizes the locations, as the CSV rows are received.
+
+    :returns: The normalized locations.
+    :rtype: List[CSBSLocation]
+    """
+    rows = httputils.iter_csv_rows(response)
+
+    # Read the columns by position.
+    schema = await CSVSchema.from_rows(rows)
+    get_fields = schema.getter(
+        "State Name", "County Name", "Last Update", "Latitude", "Longitude", "Confirmed", "Death",
+    )
+
+    locations = []
+
+    i = -1
+    async for row in rows:
+        # Skip blank lines.
+        if not row:
+            continue
+        i += 1
+
+        # General info.
+        state, county, last_update, latitude, longitude, confirmed, deaths = get_fields(
+            schema.pad(row)
+        )
+
+        # Ensure country is specified.
+        if county in {"Unassigned", "Unknown"}:
+            continue
+
+        # Date string without "EDT" at end.
+        last_update = " ".join(last_update.split(" ")[0:2])
+
+        # Append to locations.
+        locations.append(
+            CSBSLocation(
+                # General info.
+                i,
+                state,
+                county,
+                # Coordinates.
+                Coordinates(latitude, longitude),
+                # Last update (parse as ISO).
+                datetime.strptime(last_update, "%Y-%m-%d %H:%M").isoformat() + "Z",
+                # Statistics.
+                int(confirmed or 0),
+                int(deaths or 0),
+            )
+        )
+    return locations
+
 
-@cached(cache=TTLCache(maxsize=1, ttl=1800))
+def dump_locations(locations):
+    """
+    Gets the dataset of the locations, to store in the shared cache.
+
+    :returns: The metadata of the locations (CSBS has no timelines).
+    :rtype: list
+    """
+    return [
+        [
+            location.id,
+            location.state,
+            location.county,
+            location.latitude,
+            location.longitude,
+            location.last_updated,
+            location.confirmed,
+            location.deaths,
+        ]
+        for location in locations
+    ]
+
+
+def restore_locations(metadata):
+    """
+    Restores the locations from their dataset (see `dump_locations`).
+
+    :returns: The locations.
+    :rtype: List[CSBSLocation]
+    """
+    return [
+        CSBSLocation(
+            loc_id, state, county, Coordinates(latitude, longitude), last_updated, confirmed, deaths
+        )
+        for loc_id, state, county, latitude, longitude, last_updated, confirmed, deaths in metadata
+    ]
+
+
+@cached(cache=LOCATIONS_CACHE)
+@singleflight
 async def get_locations():
     """
     Retrieves county locations; locations are cached for 1 hour
@@ -46,57 +147,26 @@ async def get_locations():
     data_id = "csbs.locations"
     LOGGER.info(f"{data_id} Requesting data...")
     # check shared cache
-    cache_results = await check_cache(data_id)
+    cache_results = await check_dataset(data_id)
     if cache_results:
         LOGGER.info(f"{data_id} using shared cache results")
-        locations = cache_results
+        metadata, _ = cache_results
+        locations = restore_locations(metadata)
     else:
         LOGGER.info(f"{data_id} shared cache empty")
-        async with httputils.CLIENT_SESSION.get(BASE_URL) as response:
-            text = await response.text()
-
-        LOGGER.debug(f"{data_id} Data received")
-
-        data = list(csv.DictReader(text.splitlines()))
-        LOGGER.debug(f"{data_id} CSV parsed")
-
-        locations = []
-
-        for i, item in enumerate(data):
-            # General info.
-            state = item["State Name"]
-            county = item["County Name"]
-
-            # Ensure country is specified.
-            if county in {"Unassigned", "Unknown"}:
-                continue
-
-            # Date string without "EDT" at end.
-            last_update = " ".join(item["Last Update"].split(" ")[0:2])
-
-            # Append to locations.
-            locations.append(
-                CSBSLocation(
-                    # General info.
-                    i,
-                    state,
-                    county,
-                    # Coordinates.
-                    Coordinates(item["Latitude"], item["Longitude"]),
-                    # Last update (parse as ISO).
-                    datetime.strptime(last_update, "%Y-%m-%d %H:%M").isoformat() + "Z",
-                    # Statistics.
-                    int(item["Confirmed"] or 0),
-                    int(item["Death"] or 0),
-                )
-            )
-        LOGGER.info(f"{data_id} Data normalized")
+        # Request the data (unless not modified since the current data was fetched).
+        current = cached_value(LOCATIONS_CACHE)
+        headers = httputils.conditional_headers(BASE_URL, current)
+        async with httputils.CLIENT_SESSION.get(BASE_URL, headers=headers) as response:
+            if httputils.not_modified(BASE_URL, response):
+                LOGGER.info(f"{data_id} not modified, keeping current data")
+                locations = current
+            else:
+                locations = await parse_locations(response)
+                httputils.store_validated(BASE_URL, response)
+                LOGGER.info(f"{data_id} Data normalized")
         # save the results to distributed cache
-        # TODO: fix json serialization
-        try:
-            await load_cache(data_id, locations)
-        except TypeError as type_err:
-            LOGGER.error(type_err)
+        await load_dataset(data_id, dump_locations(locations))
 
     # Return the locations.
     return locations
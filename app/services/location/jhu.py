@@ -1,20 +1,22 @@
 """app.services.location.jhu.py"""
-import csv
 import logging
+import operator
 import os
+from array import array
 from datetime import datetime
 from pprint import pformat as pf
 
 from asyncache import cached
 from cachetools import TTLCache
 
-from ...caches import check_cache, load_cache
+from ...caches import cached_value, check_dataset, load_dataset, refresh_cached, singleflight
 from ...coordinates import Coordinates
 from ...location import TimelinedLocation
-from ...models import Timeline
+from ...timeseries import MISSING, TYPECODE, TimeSeries
 from ...utils import countries
 from ...utils import date as date_util
 from ...utils import httputils
+from ...utils.csvschema import CSVSchema
 from . import LocationService
 
 LOGGER = logging.getLogger("services.location.jhu")
@@ -26,6 +28,8 @@ class JhuLocationService(LocationService):
     Service for retrieving locations from Johns Hopkins CSSE (https://github.com/CSSEGISandData/COVID-19).
     """
 
+    data_ids = ("jhu.locations",)
+
     async def get_all(self):
         # Get the locations.
         locations = await get_locations()
@@ -36,6 +40,10 @@ class JhuLocationService(LocationService):
         locations = await self.get_all()
         return locations[loc_id]
 
+    async def refresh(self):
+        # Refresh the locations (from their dataset, or from the refreshed categories).
+        await refresh_cached(get_locations, LOCATIONS_CACHE)
+
 
 # ---------------------------------------------------------------
 
@@ -43,21 +51,38 @@ class JhuLocationService(LocationService):
 # Base URL for fetching category.
 BASE_URL = "https://raw.githubusercontent.com/CSSEGISandData/2019-nCoV/master/csse_covid_19_data/csse_covid_19_time_series/"
 
+# Categories of the time series.
+CATEGORIES = ("confirmed", "deaths", "recovered")
+
+# Local caches of the categories and of the locations.
+CATEGORIES_CACHE = TTLCache(maxsize=4, ttl=1800)
+LOCATIONS_CACHE = TTLCache(maxsize=1, ttl=1800)
+
+# Categories the current locations were built from, with the locations.
+BUILT = {}
+
 
-@cached(cache=TTLCache(maxsize=4, ttl=1800))
+@cached(cache=CATEGORIES_CACHE)
+@singleflight
 async def get_category(category):
     """
     Retrieves the data for the provided category. The data is cached for 30 minutes locally, 1 hour via shared Redis.
 
-    :returns: The data for category.
-    :rtype: dict
+    The histories of the locations are kept in a columnar series (see `restore_category` for the
+    data with histories).
+
+    :returns: The data for category without the histories, and the series of the histories.
+    :rtype: tuple
     """
+    # Data currently cached, kept when not modified upstream.
+    current = cached_value(CATEGORIES_CACHE, category)
+
     # Adhere to category naming standard.
     category = category.lower()
     data_id = f"jhu.{category}"
 
     # check shared cache
-    cache_results = await check_cache(data_id)
+    cache_results = await check_dataset(data_id)
     if cache_results:
         LOGGER.info(f"{data_id} using shared cache results")
         results = cache_results
@@ -66,163 +91,309 @@ async def get_category(category):
         # URL to request data from.
         url = BASE_URL + "time_series_covid19_%s_global.csv" % category
 
-        # Request the data
+        # Request the data (unless not modified since the current data was fetched).
         LOGGER.info(f"{data_id} Requesting data...")
-        async with httputils.CLIENT_SESSION.get(url) as response:
-            text = await response.text()
-
-        LOGGER.debug(f"{data_id} Data received")
-
-        # Parse the CSV.
-        data = list(csv.DictReader(text.splitlines()))
-        LOGGER.debug(f"{data_id} CSV parsed")
-
-        # The normalized locations.
-        locations = []
-
-        for item in data:
-            # Filter out all the dates.
-            dates = dict(filter(lambda element: date_util.is_date(element[0]), item.items()))
-
-            # Make location history from dates.
-            history = {date: int(float(amount or 0)) for date, amount in dates.items()}
-
-            # Country for this location.
-            country = item["Country/Region"]
-
-            # Latest data insert value.
-            latest = list(history.values())[-1]
-
-            # Normalize the item and append to locations.
-            locations.append(
-                {
-                    # General info.
-                    "country": country,
-                    "country_code": countries.country_code(country),
-                    "province": item["Province/State"],
-                    # Coordinates.
-                    "coordinates": {"lat": item["Lat"], "long": item["Long"],},
-                    # History.
-                    "history": history,
-                    # Latest statistic.
-                    "latest": int(latest or 0),
-                }
-            )
-        LOGGER.debug(f"{data_id} Data normalized")
-
-        # Latest total.
-        latest = sum(map(lambda location: location["latest"], locations))
-
-        # Return the final data.
-        results = {
-            "locations": locations,
-            "latest": latest,
-            "last_updated": datetime.utcnow().isoformat() + "Z",
-            "source": "https://github.com/ExpDev07/coronavirus-tracker-api",
-        }
+        headers = httputils.conditional_headers(url, current)
+        async with httputils.CLIENT_SESSION.get(url, headers=headers) as response:
+            if httputils.not_modified(url, response):
+                LOGGER.info(f"{data_id} not modified, keeping current data")
+                results = current
+            else:
+                locations, series = await parse_category(response)
+                LOGGER.debug(f"{data_id} Data normalized")
+
+                # Latest total.
+                latest = sum(map(lambda location: location["latest"], locations))
+
+                # Return the final data.
+                results = (
+                    {
+                        "locations": locations,
+                        "latest": latest,
+                        "last_updated": datetime.utcnow().isoformat() + "Z",
+                        "source": "https://github.com/ExpDev07/coronavirus-tracker-api",
+                    },
+                    series,
+                )
+                httputils.store_validated(url, response)
+
         # save the results to distributed cache
-        await load_cache(data_id, results)
+        await load_dataset(data_id, *results)
 
-    LOGGER.info(f"{data_id} results:\n{pf(results, depth=1)}")
+    LOGGER.info(f"{data_id} results:\n{pf(results[0], depth=1)}")
     return results
 
 
-@cached(cache=TTLCache(maxsize=1, ttl=1800))
-async def get_locations():
+def restore_category(metadata, series):
     """
-    Retrieves the locations from the categories. The locations are cached for 1 hour.
+    Restores the data of a category with the history of every location (as served by v1), from
+    the data without the histories and the series of the histories (see `get_category`).
 
-    :returns: The locations.
-    :rtype: List[Location]
+    :returns: The data for category.
+    :rtype: dict
     """
-    data_id = "jhu.locations"
-    LOGGER.info(f"pid:{PID}: {data_id} Requesting data...")
-    # Get all of the data categories locations.
-    confirmed = await get_category("confirmed")
-    deaths = await get_category("deaths")
-    recovered = await get_category("recovered")
+    locations = []
+    for idx, location in enumerate(metadata["locations"]):
+        history = {
+            date: amount
+            for date, amount in zip(series.dates, series.row("history", idx))
+            if amount != MISSING
+        }
+        locations.append({**location, "history": history})
+    return {**metadata, "locations": locations}
 
-    locations_confirmed = confirmed["locations"]
-    locations_deaths = deaths["locations"]
-    locations_recovered = recovered["locations"]
 
-    # Final locations to return.
+async def parse_category(response):
+    """
+    Parses and normalizes the locations of a category, as the CSV rows are received. Their
+    histories are stored in a columnar series, one row per location.
+
+    :returns: The normalized locations (without histories) and the series of the histories.
+    :rtype: tuple
+    """
+    rows = httputils.iter_csv_rows(response)
+
+    # Classify the columns once from the header.
+    schema = await CSVSchema.from_rows(rows)
+    get_metadata = schema.getter("Province/State", "Country/Region", "Lat", "Long")
+
+    # The normalized locations, and the cells of their histories.
     locations = []
-    # ***************************************************************************
-    # TODO: This iteration approach assumes the indexes remain the same
-    #       and opens us to a CRITICAL ERROR. The removal of a column in the data source
-    #       would break the API or SHIFT all the data confirmed, deaths, recovery producting
-    #       incorrect data to consumers.
-    # ***************************************************************************
-    # Go through locations.
-    for index, location in enumerate(locations_confirmed):
-        # Get the timelines.
-
-        # TEMP: Fix for merging recovery data. See TODO above for more details.
-        key = (location["country"], location["province"])
-
-        timelines = {
-            "confirmed": location["history"],
-            "deaths": parse_history(key, locations_deaths, index),
-            "recovered": parse_history(key, locations_recovered, index),
-        }
+    column = array(TYPECODE)
+
+    async for row in rows:
+        # Skip blank lines.
+        if not row:
+            continue
+        row = schema.pad(row)
+        province, country, latitude, longitude = get_metadata(row)
 
-        # Grab coordinates.
-        coordinates = location["coordinates"]
+        # Make location history from dates.
+        history = [int(float(amount or 0)) for amount in schema.date_values(row)]
+        column.extend(history)
 
-        # Create location (supporting timelines) and append.
+        # Normalize the item and append to locations.
         locations.append(
-            TimelinedLocation(
+            {
                 # General info.
-                index,
-                location["country"],
-                location["province"],
+                "country": country,
+                "country_code": countries.country_code(country),
+                "province": province,
                 # Coordinates.
-                Coordinates(latitude=coordinates["lat"], longitude=coordinates["long"]),
-                # Last update.
-                datetime.utcnow().isoformat() + "Z",
-                # Timelines (parse dates as ISO).
-                {
-                    "confirmed": Timeline(
-                        timeline={
-                            datetime.strptime(date, "%m/%d/%y").isoformat() + "Z": amount
-                            for date, amount in timelines["confirmed"].items()
-                        }
-                    ),
-                    "deaths": Timeline(
-                        timeline={
-                            datetime.strptime(date, "%m/%d/%y").isoformat() + "Z": amount
-                            for date, amount in timelines["deaths"].items()
-                        }
-                    ),
-                    "recovered": Timeline(
-                        timeline={
-                            datetime.strptime(date, "%m/%d/%y").isoformat() + "Z": amount
-                            for date, amount in timelines["recovered"].items()
-                        }
-                    ),
-                },
-            )
+                "coordinates": {"lat": latitude, "long": longitude,},
+                # History (restored from the series).
+                "history": None,
+                # Latest statistic.
+                "latest": history[-1] if history else 0,
+            }
         )
-    LOGGER.info(f"{data_id} Data normalized")
+    return locations, TimeSeries(schema.dates, {"history": column}, len(locations))
+
+
+@cached(cache=LOCATIONS_CACHE)
+@singleflight
+async def get_locations():
+    """
+    Retrieves the locations from the categories. The locations are cached for 30 minutes
+    locally, 1 hour via shared Redis.
+
+    :returns: The locations.
+    :rtype: List[Location]
+    """
+    data_id = "jhu.locations"
+    LOGGER.info(f"pid:{PID}: {data_id} Requesting data...")
+    # check shared cache
+    cache_results = await check_dataset(data_id)
+    if cache_results:
+        LOGGER.info(f"{data_id} using shared cache results")
+        return restore_locations(*cache_results)
+    LOGGER.info(f"{data_id} shared cache empty")
+
+    # Get all of the data categories locations (concurrently), refreshed rather than cached.
+    categories = await httputils.gather(
+        *(refresh_cached(get_category, CATEGORIES_CACHE, category) for category in CATEGORIES)
+    )
+
+    # Reuse the locations when none of the categories changed (e.g. not modified upstream).
+    if BUILT and all(map(operator.is_, BUILT["categories"], categories)):
+        LOGGER.info(f"{data_id} categories unchanged, keeping current data")
+        locations = BUILT["locations"]
+    else:
+        locations = join_categories(data_id, *categories)
+        BUILT.update(categories=categories, locations=locations)
+
+    # save the locations to distributed cache
+    await load_dataset(data_id, *dump_locations(locations))
 
     # Finally, return the locations.
     return locations
 
 
-def parse_history(key: tuple, locations: list, index: int):
+def join_categories(data_id, confirmed, deaths, recovered):
+    """
+    Makes the locations from the data of the categories.
+
+    :returns: The locations.
+    :rtype: List[TimelinedLocation]
+    """
+    locations_confirmed = confirmed[0]["locations"]
+
+    # Get the rows of every location, joining the categories on (country, province).
+    rows, unmatched = join_rows(
+        locations_confirmed,
+        {"deaths": deaths[0]["locations"], "recovered": recovered[0]["locations"]},
+    )
+    for category, keys in unmatched.items():
+        LOGGER.warning(f"{data_id} {len(keys)} unmatched {category} keys: {sorted(keys)}")
+
+    # Store the timelines in a columnar series, and make the locations from its rows.
+    series = build_series(
+        rows, {"confirmed": confirmed[1], "deaths": deaths[1], "recovered": recovered[1]}
+    )
+    locations = build_locations(series, locations_confirmed)
+    LOGGER.info(f"{data_id} Data normalized")
+    return locations
+
+
+def build_series(rows, histories):
+    """
+    Stores the histories of the joined rows of the categories in a columnar series, on a date
+    axis shared by the categories.
+
+    :param rows: The row of every location by category (see `join_rows`).
+    :param histories: The series of the histories of every category.
+    :returns: The series.
+    :rtype: TimeSeries
+    """
+    # Parse every distinct date once as ISO.
+    iso_dates = {
+        date: date_util.iso_date(date, "%m/%d/%y")
+        for date in set().union(*(history.dates for history in histories.values()))
+    }
+
+    series = TimeSeries.empty(sorted(set(iso_dates.values())), CATEGORIES, len(rows))
+    positions = {date: series.positions[iso_date] for date, iso_date in iso_dates.items()}
+    for index, location_rows in enumerate(rows):
+        for category, row in location_rows.items():
+            if row is not None:
+                history = histories[category]
+                series.fill(
+                    category,
+                    index,
+                    dict(zip(history.dates, history.row("history", row))),
+                    positions,
+                )
+    return series
+
+
+def build_locations(series, locations):
+    """
+    Builds the locations (of the confirmed category) from the rows of the series.
+
+    :returns: The locations.
+    :rtype: List[TimelinedLocation]
+    """
+    return [
+        TimelinedLocation(
+            # General info.
+            index,
+            location["country"],
+            location["province"],
+            # Coordinates.
+            Coordinates(
+                latitude=location["coordinates"]["lat"], longitude=location["coordinates"]["long"]
+            ),
+            # Last update.
+            datetime.utcnow().isoformat() + "Z",
+            # Timelines (views into the series).
+            {category: series.timeline(category, index) for category in CATEGORIES},
+        )
+        for index, location in enumerate(locations)
+    ]
+
+
+def dump_locations(locations):
+    """
+    Gets the dataset of the locations, to store in the shared cache.
+
+    :returns: The metadata of the locations and the series of their timelines.
+    :rtype: tuple
     """
-    Helper for validating and extracting history content from
-    locations data based on index. Validates with the current country/province
-    key to make sure no index/column issue.
+    if not locations:
+        return [], TimeSeries.empty((), CATEGORIES, 0)
+    metadata = [
+        [
+            location.timelines["confirmed"].row,
+            location.country,
+            location.province,
+            location.latitude,
+            location.longitude,
+            location.last_updated,
+        ]
+        for location in locations
+    ]
+    return metadata, locations[0].timelines["confirmed"].series
+
+
+def restore_locations(metadata, series):
+    """
+    Restores the locations from their dataset (see `dump_locations`), with timelines viewing
+    its series.
 
-    TEMP: solution because implement a more efficient and better approach in the refactor.
+    :returns: The locations.
+    :rtype: List[TimelinedLocation]
     """
-    location_history = {}
-    try:
-        if key == (locations[index]["country"], locations[index]["province"]):
-            location_history = locations[index]["history"]
-    except (IndexError, KeyError):
-        LOGGER.debug(f"iteration data merge error: {index} {key}")
+    return [
+        TimelinedLocation(
+            index,
+            country,
+            province,
+            Coordinates(latitude=latitude, longitude=longitude),
+            last_updated,
+            {category: series.timeline(category, row) for category in CATEGORIES},
+        )
+        for index, (row, country, province, latitude, longitude, last_updated) in enumerate(
+            metadata
+        )
+    ]
+
+
+def location_key(location: dict):
+    """
+    Gets the key identifying a location across the categories.
+
+    :returns: The (country, province) key.
+    :rtype: tuple
+    """
+    return (location["country"], location["province"])
+
+
+def join_rows(locations: list, others: dict):
+    """
+    Hash joins the rows of other categories to the locations (of the confirmed category) on
+    their (country, province) key. Locations missing from another category get no row.
+
+    :param locations: The locations of the confirmed category.
+    :param others: The locations of the other categories, by category.
+    :returns: The row of every location by category (None when missing), and the keys which
+              could not be matched (in either direction) by category.
+    :rtype: tuple
+    """
+    # Index every other category once.
+    indexes = {
+        category: {location_key(location): row for row, location in enumerate(category_locations)}
+        for category, category_locations in others.items()
+    }
+
+    rows = []
+    for row, location in enumerate(locations):
+        key = location_key(location)
+        rows.append(
+            {"confirmed": row, **{category: index.get(key) for category, index in indexes.items()}}
+        )
 
-    return location_history
+    confirmed_keys = {location_key(location) for location in locations}
+    unmatched = {
+        category: confirmed_keys.symmetric_difference(index) for category, index in indexes.items()
+    }
+    return rows, {category: keys for category, keys in unmatched.items() if keys}
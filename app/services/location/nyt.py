@@ -1,19 +1,23 @@
 """app.services.location.nyt.py"""
-import csv
 import logging
 from datetime import datetime
 
 from asyncache import cached
 from cachetools import TTLCache
 
-from ...caches import check_cache, load_cache
+from ...caches import cached_value, check_dataset, load_dataset, refresh_cached, singleflight
+from ...config import get_settings
 from ...coordinates import Coordinates
 from ...location.nyt import NYTLocation
 from ...models import Timeline
+from ...timeseries import TimeSeries
+from ...utils import date as date_util
 from ...utils import httputils
+from ...utils.csvschema import CSVSchema
 from . import LocationService
 
 LOGGER = logging.getLogger("services.location.nyt")
+SETTINGS = get_settings()
 
 
 class NYTLocationService(LocationService):
@@ -21,6 +25,8 @@ class NYTLocationService(LocationService):
     Service for retrieving locations from New York Times (https://github.com/nytimes/covid-19-data).
     """
 
+    data_ids = ("nyt.locations",)
+
     async def get_all(self):
         # Get the locations.
         locations = await get_locations()
@@ -31,6 +37,9 @@ class NYTLocationService(LocationService):
         locations = await self.get_all()
         return locations[loc_id]
 
+    async def refresh(self):
+        await refresh_cached(get_locations, LOCATIONS_CACHE)
+
 
 # ---------------------------------------------------------------
 
@@ -38,36 +47,251 @@ class NYTLocationService(LocationService):
 # Base URL for fetching category.
 BASE_URL = "https://raw.githubusercontent.com/nytimes/covid-19-data/master/us-counties.csv"
 
+# Categories of the time series (NYT does not report recoveries).
+CATEGORIES = ("confirmed", "deaths")
+
+# Local cache of the locations.
+LOCATIONS_CACHE = TTLCache(maxsize=1, ttl=1800)
+
+# State of the last ingest (schema, counties, series, last date and byte offset), from which
+# the rows appended upstream are ingested.
+INGEST = {}
 
-def get_grouped_locations_dict(data):
+
+async def get_grouped_locations_dict(data, schema):
     """
-    Helper function to group history for locations into one dict.
+    Helper function to group history for locations into one dict, as the rows are received.
 
     :returns: The complete data for each unique US county
     :rdata: dict
     """
     grouped_locations = {}
+    get_fields = schema.getter("county", "state", "date", "cases", "deaths")
+
+    # Share a single string object for every occurrence of a date.
+    dates = {}
 
     # in increasing order of dates
-    for row in data:
-        county_state = (row["county"], row["state"])
-        date = row["date"]
-        confirmed = row["cases"]
-        deaths = row["deaths"]
+    async for row in data:
+        # Skip blank lines.
+        if not row:
+            continue
+        county, state, date, confirmed, deaths = get_fields(schema.pad(row))
+        county_state = (county, state)
+        date = dates.setdefault(date, date)
 
         # initialize if not existing
         if county_state not in grouped_locations:
-            grouped_locations[county_state] = {"confirmed": [], "deaths": []}
+            grouped_locations[county_state] = {"confirmed": {}, "deaths": {}}
 
-        # append confirmed tuple to county_state (date, # confirmed)
-        grouped_locations[county_state]["confirmed"].append((date, confirmed))
-        # append deaths tuple to county_state (date, # deaths)
-        grouped_locations[county_state]["deaths"].append((date, deaths))
+        # add confirmed amount to county_state history
+        grouped_locations[county_state]["confirmed"][date] = int(confirmed or 0)
+        # add deaths amount to county_state history
+        grouped_locations[county_state]["deaths"][date] = int(deaths or 0)
 
     return grouped_locations
 
 
-@cached(cache=TTLCache(maxsize=1, ttl=1800))
+async def parse_locations(response):
+    """
+    Parses and normalizes the locations, as the CSV rows are received.
+
+    :returns: The normalized locations.
+    :rtype: List[NYTLocation]
+    """
+    rows = httputils.iter_csv_rows(response)
+
+    # Group together locations (NYT data ordered by dates not location), reading the columns
+    # by position.
+    schema = await CSVSchema.from_rows(rows)
+    grouped_locations = await get_grouped_locations_dict(rows, schema)
+
+    # Row of every county in the series.
+    counties = {county_state: idx for idx, county_state in enumerate(grouped_locations)}
+
+    # Store the timelines in a columnar series.
+    dates = get_dates(grouped_locations)
+    series = TimeSeries.empty(sorted(set(dates.values())), CATEGORIES, len(counties))
+    fill_series(series, counties, grouped_locations, dates)
+
+    INGEST.update(
+        schema=schema,
+        counties=counties,
+        series=series,
+        last_date=max(dates, default=""),
+        offset=response.content.total_bytes,
+    )
+    return build_locations(series, counties)
+
+
+async def parse_appended_locations(response):
+    """
+    Appends the rows received after the last ingest (the tail of the CSV) to the locations.
+
+    :returns: The normalized locations, or None when the rows are not dated after the last
+              ingest (i.e. the data was not only appended to).
+    :rtype: Optional[List[NYTLocation]]
+    """
+    rows = httputils.iter_csv_rows(response)
+    grouped_locations = await get_grouped_locations_dict(rows, INGEST["schema"])
+
+    dates = get_dates(grouped_locations)
+    if not dates:
+        return build_locations(INGEST["series"], INGEST["counties"])
+    if min(dates) <= INGEST["last_date"]:
+        return None
+
+    # New counties are added after the known ones.
+    counties = dict(INGEST["counties"])
+    for county_state in grouped_locations:
+        counties.setdefault(county_state, len(counties))
+
+    # Extend the date axis and the rows of the series with the new data.
+    series = INGEST["series"].extend(sorted(set(dates.values())), len(counties))
+    fill_series(series, counties, grouped_locations, dates)
+
+    INGEST.update(
+        counties=counties,
+        series=series,
+        last_date=max(dates),
+        # The tail starts on the line break ending the data of the last ingest.
+        offset=INGEST["offset"] - 1 + response.content.total_bytes,
+    )
+    return build_locations(series, counties)
+
+
+def get_dates(grouped_locations):
+    """
+    Parses every distinct date of the grouped locations once as ISO.
+
+    :returns: The ISO dates, by date.
+    :rtype: dict
+    """
+    return {
+        date: date_util.iso_date(date, "%Y-%m-%d")
+        for date in set().union(
+            *(timelines["confirmed"] for timelines in grouped_locations.values())
+        )
+    }
+
+
+def fill_series(series, counties, grouped_locations, dates):
+    """
+    Writes the histories of the grouped locations into the rows of their counties.
+    """
+    positions = {date: series.positions[iso_date] for date, iso_date in dates.items()}
+    for county_state, timelines in grouped_locations.items():
+        for category, history in timelines.items():
+            series.fill(category, counties[county_state], history, positions)
+
+
+def build_locations(series, counties):
+    """
+    Builds the locations from the rows of the series.
+
+    :returns: The normalized locations.
+    :rtype: List[NYTLocation]
+    """
+    return [
+        NYTLocation(
+            id=idx,
+            state=county_state[1],
+            county=county_state[0],
+            coordinates=Coordinates(None, None),  # NYT does not provide coordinates
+            last_updated=datetime.utcnow().isoformat() + "Z",  # since last request
+            timelines={
+                "confirmed": series.timeline("confirmed", idx),
+                "deaths": series.timeline("deaths", idx),
+                "recovered": Timeline(),
+            },
+        )
+        for county_state, idx in counties.items()
+    ]
+
+
+def dump_locations(locations):
+    """
+    Gets the dataset of the locations, to store in the shared cache.
+
+    :returns: The metadata of the locations and the series of their timelines.
+    :rtype: tuple
+    """
+    if not locations:
+        return [], TimeSeries.empty((), CATEGORIES, 0)
+    metadata = [
+        [
+            location.timelines["confirmed"].row,
+            location.state,
+            location.county,
+            location.last_updated,
+        ]
+        for location in locations
+    ]
+    return metadata, locations[0].timelines["confirmed"].series
+
+
+def restore_locations(metadata, series):
+    """
+    Restores the locations from their dataset (see `dump_locations`).
+
+    :returns: The locations.
+    :rtype: List[NYTLocation]
+    """
+    return [
+        NYTLocation(
+            id=idx,
+            state=state,
+            county=county,
+            coordinates=Coordinates(None, None),
+            last_updated=last_updated,
+            timelines={
+                "confirmed": series.timeline("confirmed", row),
+                "deaths": series.timeline("deaths", row),
+                "recovered": Timeline(),
+            },
+        )
+        for idx, (row, state, county, last_updated) in enumerate(metadata)
+    ]
+
+
+async def get_appended_locations(data_id):
+    """
+    Requests the bytes appended to the CSV since the last ingest (HTTP range request).
+
+    :returns: The normalized locations, or None when a complete ingest is required.
+    :rtype: Optional[List[NYTLocation]]
+    """
+    current = cached_value(LOCATIONS_CACHE)
+    headers = {
+        **httputils.conditional_headers(BASE_URL, current),
+        # Byte offsets only hold for the unencoded body. The range starts on the line break
+        # ending the data of the last ingest, to make sure nothing was inserted before it.
+        "Accept-Encoding": "identity",
+        "Range": f"bytes={INGEST['offset'] - 1}-",
+    }
+    async with httputils.CLIENT_SESSION.get(BASE_URL, headers=headers) as response:
+        if httputils.not_modified(BASE_URL, response):
+            LOGGER.info(f"{data_id} not modified, keeping current data")
+            return current
+
+        if response.status == 200:
+            # Range requests not supported, the complete data was received.
+            locations = await parse_locations(response)
+        elif response.status == 206 and await response.content.read(1) == b"\n":
+            locations = await parse_appended_locations(response)
+        else:
+            locations = None
+
+        if locations is None:
+            LOGGER.info(f"{data_id} not only appended to, ingesting the complete data")
+        else:
+            httputils.store_validated(BASE_URL, response)
+            LOGGER.info(f"{data_id} Appended data normalized")
+        return locations
+
+
+@cached(cache=LOCATIONS_CACHE)
+@singleflight
 async def get_locations():
     """
     Returns a list containing parsed NYT data by US county. The data is cached for 1 hour.
@@ -79,67 +303,29 @@ async def get_locations():
     # Request the data.
     LOGGER.info(f"{data_id} Requesting data...")
     # check shared cache
-    cache_results = await check_cache(data_id)
+    cache_results = await check_dataset(data_id)
     if cache_results:
         LOGGER.info(f"{data_id} using shared cache results")
-        locations = cache_results
+        locations = restore_locations(*cache_results)
     else:
         LOGGER.info(f"{data_id} shared cache empty")
-        async with httputils.CLIENT_SESSION.get(BASE_URL) as response:
-            text = await response.text()
-
-        LOGGER.debug(f"{data_id} Data received")
-
-        # Parse the CSV.
-        data = list(csv.DictReader(text.splitlines()))
-        LOGGER.debug(f"{data_id} CSV parsed")
-
-        # Group together locations (NYT data ordered by dates not location).
-        grouped_locations = get_grouped_locations_dict(data)
-
-        # The normalized locations.
-        locations = []
-
-        for idx, (county_state, histories) in enumerate(grouped_locations.items()):
-            # Make location history for confirmed and deaths from dates.
-            # List is tuples of (date, amount) in order of increasing dates.
-            confirmed_list = histories["confirmed"]
-            confirmed_history = {date: int(amount or 0) for date, amount in confirmed_list}
-
-            deaths_list = histories["deaths"]
-            deaths_history = {date: int(amount or 0) for date, amount in deaths_list}
-
-            # Normalize the item and append to locations.
-            locations.append(
-                NYTLocation(
-                    id=idx,
-                    state=county_state[1],
-                    county=county_state[0],
-                    coordinates=Coordinates(None, None),  # NYT does not provide coordinates
-                    last_updated=datetime.utcnow().isoformat() + "Z",  # since last request
-                    timelines={
-                        "confirmed": Timeline(
-                            timeline={
-                                datetime.strptime(date, "%Y-%m-%d").isoformat() + "Z": amount
-                                for date, amount in confirmed_history.items()
-                            }
-                        ),
-                        "deaths": Timeline(
-                            timeline={
-                                datetime.strptime(date, "%Y-%m-%d").isoformat() + "Z": amount
-                                for date, amount in deaths_history.items()
-                            }
-                        ),
-                        "recovered": Timeline(),
-                    },
-                )
-            )
-        LOGGER.info(f"{data_id} Data normalized")
+        locations = None
+        if SETTINGS.nyt_incremental_ingest and INGEST:
+            # Only request the rows appended since the last ingest.
+            locations = await get_appended_locations(data_id)
+        if locations is None:
+            # Request the data (unless not modified since the current data was fetched).
+            current = cached_value(LOCATIONS_CACHE)
+            headers = httputils.conditional_headers(BASE_URL, current)
+            async with httputils.CLIENT_SESSION.get(BASE_URL, headers=headers) as response:
+                if httputils.not_modified(BASE_URL, response):
+                    LOGGER.info(f"{data_id} not modified, keeping current data")
+                    locations = current
+                else:
+                    locations = await parse_locations(response)
+                    httputils.store_validated(BASE_URL, response)
+                    LOGGER.info(f"{data_id} Data normalized")
         # save the results to distributed cache
-        # TODO: fix json serialization
-        try:
-            await load_cache(data_id, locations)
-        except TypeError as type_err:
-            LOGGER.error(type_err)
+        await load_dataset(data_id, *dump_locations(locations))
 
     return locations
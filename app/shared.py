@@ -0,0 +1,80 @@
+"""app.shared.py"""
+import logging
+import mmap
+import os
+
+from . import codec
+
+LOGGER = logging.getLogger(__name__)
+
+# Whether the datasets are read from the shared files (not by the ingest process, which writes
+# them).
+MAPPED = True
+
+# Versions (inode and modification time) of the files last mapped, by dataset id.
+VERSIONS = {}
+
+
+def dataset_path(directory, data_id):
+    """Get the path of the file of a dataset."""
+    return os.path.join(directory, f"{data_id}.dataset")
+
+
+def write_dataset(directory, data_id, metadata, series=None):
+    """
+    Write a dataset (uncompressed, so its matrices can be mapped as they are) to its file.
+
+    The file is replaced atomically: processes that mapped the previous one keep it until they
+    swap in the new one.
+    """
+    path = dataset_path(directory, data_id)
+    os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(codec.encode(metadata, series, compress=False))
+    os.replace(temporary, path)
+    LOGGER.info(f"{data_id} written to {path}")
+
+
+def read_dataset(directory, data_id):
+    """
+    Map the file of a dataset read-only. The matrices of its series are views into the mapping,
+    shared with every other process mapping the file.
+
+    :returns: The dataset, or None when the file is missing or not in the current format.
+    :rtype: Optional[tuple]
+    """
+    path = dataset_path(directory, data_id)
+    try:
+        with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    try:
+        dataset = codec.decode(mapping, copy=False)
+    except codec.DecodeError as err:
+        LOGGER.warning(f"{data_id} file ignored: {err}")
+        return None
+    VERSIONS[data_id] = (stat.st_ino, stat.st_mtime_ns)
+    LOGGER.info(f"{data_id} mapped from {path}")
+    return dataset
+
+
+def changed_datasets(directory, data_ids):
+    """
+    Check which files of the datasets were replaced since they were last mapped.
+
+    :returns: The ids of the changed datasets.
+    :rtype: list
+    """
+    changed = []
+    for data_id in data_ids:
+        try:
+            stat = os.stat(dataset_path(directory, data_id))
+        except FileNotFoundError:
+            continue
+        if (stat.st_ino, stat.st_mtime_ns) != VERSIONS.get(data_id):
+            changed.append(data_id)
+    return changed
@@ -0,0 +1,160 @@
+"""app.snapshot.py"""
+import itertools
+
+from cachetools import LRUCache
+
+# Maximum size (in bytes) of the encoded responses kept per snapshot.
+RESPONSE_CACHE_SIZE = 16 * 2 ** 20
+
+# Attributes of the locations indexed for filtering.
+INDEXED_ATTRIBUTES = ("country_code", "province", "state", "county")
+
+# Attributes of the locations which are not filtered on (the coordinates, stored inline).
+UNFILTERED_ATTRIBUTES = ("latitude", "longitude")
+
+# Versions of the snapshots, increasing as datasets are swapped in.
+VERSIONS = itertools.count(1)
+
+
+class Snapshot:
+    """
+    The locations of a data-source at a point in time, along with the data derived from them.
+
+    A new snapshot (with a new version) is built whenever the data-source swaps in other
+    locations, which invalidates everything derived from the previous one.
+    """
+
+    def __init__(self, locations):
+        self.locations = locations
+        self.version = next(VERSIONS)
+
+        # Positions of the locations by (lowercase) value, for every indexed attribute.
+        self.indexes = build_indexes(locations)
+
+        # Latest totals of all the locations, and of the locations of every index bucket.
+        self.latest = latest_totals(locations)
+        self.bucket_latest = {
+            attribute: {
+                value: latest_totals(locations[position] for position in positions)
+                for value, positions in index.items()
+            }
+            for attribute, index in self.indexes.items()
+        }
+
+        # Encoded response bodies, by request, bounded by their total size.
+        self.responses = LRUCache(maxsize=RESPONSE_CACHE_SIZE, getsizeof=len)
+
+    def cache_response(self, key, body):
+        """
+        Keeps an encoded response body, unless it is larger than the whole cache.
+        """
+        if len(body) <= self.responses.maxsize:
+            self.responses[key] = body
+
+    def normalize(self, filters):
+        """
+        Drops the filters on attributes the locations do not have or which are not filtered on
+        (which `filter` ignores), so that requests selecting the same locations get the same
+        filters.
+
+        :param filters: The ``(attribute, value)`` pairs.
+        :returns: The filters on attributes of the locations.
+        :rtype: tuple
+        """
+        if not self.locations:
+            return ()
+        location = self.locations[0]
+        return tuple(
+            (key, value)
+            for key, value in filters
+            if key not in UNFILTERED_ATTRIBUTES and hasattr(location, key)
+        )
+
+    def filter(self, filters):
+        """
+        Gets the locations whose attributes (as lowercase strings) match all of the filters.
+
+        Indexed attributes are looked up, the others are compared location by location. Filters
+        on attributes the locations do not have, or on `UNFILTERED_ATTRIBUTES`, are ignored.
+
+        :param filters: The ``(attribute, value)`` pairs.
+        :returns: The matching locations, in order.
+        :rtype: list
+        """
+        positions = None
+        scanned = []
+        for key, value in filters:
+            if key in UNFILTERED_ATTRIBUTES:
+                continue
+            index = self.indexes.get(key)
+            if index is None:
+                scanned.append((key, value))
+                continue
+            matches = index.get(value, ())
+            positions = set(matches) if positions is None else positions.intersection(matches)
+
+        if positions is None:
+            locations = self.locations
+        else:
+            locations = [self.locations[position] for position in sorted(positions)]
+
+        for key, value in scanned:
+            try:
+                locations = [
+                    location
+                    for location in locations
+                    if str(getattr(location, key)).lower() == value
+                ]
+            except AttributeError:
+                pass
+        return locations
+
+    def latest_of(self, filters, locations):
+        """
+        Gets the latest totals of the locations matching the filters (as returned by `filter`),
+        read from the precomputed totals when the filters select all the locations or a bucket.
+
+        :returns: The totals.
+        :rtype: dict
+        """
+        if not filters:
+            return self.latest
+        if len(filters) == 1:
+            key, value = filters[0]
+            if key in self.bucket_latest:
+                return self.bucket_latest[key].get(value, latest_totals(()))
+        return latest_totals(locations)
+
+
+def latest_totals(locations):
+    """
+    Sums the latest statistics of the locations.
+
+    :returns: The totals.
+    :rtype: dict
+    """
+    confirmed = deaths = recovered = 0
+    for location in locations:
+        confirmed += location.confirmed
+        deaths += location.deaths
+        recovered += location.recovered
+    return {"confirmed": confirmed, "deaths": deaths, "recovered": recovered}
+
+
+def build_indexes(locations):
+    """
+    Indexes the positions of the locations by the value of every indexed attribute they have.
+
+    :returns: The indexes, by attribute.
+    :rtype: dict
+    """
+    indexes = {}
+    for attribute in INDEXED_ATTRIBUTES:
+        try:
+            values = [str(getattr(location, attribute)).lower() for location in locations]
+        except AttributeError:
+            continue
+        index = indexes[attribute] = {}
+        for position, value in enumerate(values):
+            index.setdefault(value, []).append(position)
+    return indexes
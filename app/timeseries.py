@@ -0,0 +1,415 @@
+"""app.timeseries.py"""
+import bisect
+from array import array
+
+from .utils import date as date_util
+
+# Type code of the matrices (signed 32 bit integers).
+TYPECODE = "i"
+
+# Marker for a cell without a reported value (e.g. a county before its first case).
+MISSING = -(2 ** 31)
+
+# Span of the whole date axis.
+EVERY_DATE = slice(None)
+
+# Series as reported by the sources (cumulative counts), and the series derived from them.
+CUMULATIVE = "cumulative"
+NEW = "new"
+ROLLING7 = "rolling7"
+GROWTH_RATE = "growth_rate"
+
+
+def reported(values):
+    """
+    Gets the last reported value at every cell of a row (0 before the first one).
+
+    :returns: The values.
+    :rtype: list
+    """
+    last = 0
+    result = []
+    for amount in values:
+        if amount != MISSING:
+            last = amount
+        result.append(last)
+    return result
+
+
+def new_cases(values):
+    """
+    Gets the new cases of every day of a row of cumulative counts.
+
+    :returns: The values (missing where the counts are).
+    :rtype: list
+    """
+    counts = reported(values)
+    return [
+        MISSING if amount == MISSING else counts[day] - (counts[day - 1] if day else 0)
+        for day, amount in enumerate(values)
+    ]
+
+
+def rolling_average(values, days=7):
+    """
+    Gets the average of the new cases over the last `days` of every day of a row of cumulative
+    counts.
+
+    :returns: The values (missing where the counts are).
+    :rtype: list
+    """
+    counts = reported(values)
+    return [
+        MISSING
+        if amount == MISSING
+        else round((counts[day] - (counts[day - days] if day >= days else 0)) / days, 2)
+        for day, amount in enumerate(values)
+    ]
+
+
+def growth_rate(values):
+    """
+    Gets the growth of every day of a row of cumulative counts, relative to the previous day.
+
+    :returns: The values (missing where the counts are, or the previous count is 0).
+    :rtype: list
+    """
+    counts = reported(values)
+    result = []
+    for day, amount in enumerate(values):
+        previous = counts[day - 1] if day else 0
+        if amount == MISSING or not previous:
+            result.append(MISSING)
+        else:
+            result.append(round((counts[day] - previous) / previous, 4))
+    return result
+
+
+# Derivation of the series from the rows of cumulative counts, and the type code of their cells.
+DERIVATIONS = {
+    NEW: (new_cases, TYPECODE),
+    ROLLING7: (rolling_average, "d"),
+    GROWTH_RATE: (growth_rate, "d"),
+}
+
+
+class TimeSeries:  # pylint: disable=too-many-instance-attributes
+    """
+    Columnar store of timelines sharing a single date axis.
+
+    Every category is a dense, row-major matrix (locations × dates). Rows are exposed as
+    zero-copy views into those matrices.
+    """
+
+    def __init__(self, dates, columns, size, derivation=CUMULATIVE):
+        # Sorted date axis (ISO strings) shared by every category.
+        self.dates = tuple(dates)
+        self.size = size
+
+        # What the cells hold, the reported cumulative counts or a series derived from them.
+        self.derivation = derivation
+        self.typecode = DERIVATIONS[derivation][1] if derivation in DERIVATIONS else TYPECODE
+
+        # Matrices by category, as flat buffers of `typecode` items.
+        self.columns = {
+            category: memoryview(column).cast("B").cast(self.typecode)
+            for category, column in columns.items()
+        }
+
+        # Position of every date on the axis.
+        self.positions = {date: index for index, date in enumerate(self.dates)}
+
+        # Latest value of every row, computed on first access.
+        self._latest = {}
+
+        # Positions of the last date of every period, by resolution, computed on first access.
+        self._period_ends = {}
+
+        # Derived series, by derivation, computed on first access.
+        self._derived = {}
+
+    @classmethod
+    def empty(cls, dates, categories, size):
+        """
+        Creates a series where every cell is missing, to be filled with `fill`.
+
+        :returns: The time series.
+        :rtype: TimeSeries
+        """
+        width = len(dates)
+        return cls(
+            dates,
+            {category: array(TYPECODE, [MISSING]) * (size * width) for category in categories},
+            size,
+        )
+
+    def extend(self, dates, size):
+        """
+        Creates a copy of the series with more dates (following the ones on the axis) and rows.
+
+        The existing cells are copied row by row, the new ones are missing.
+
+        :returns: The time series.
+        :rtype: TimeSeries
+        """
+        dates = self.dates + tuple(dates)
+        padding = array(TYPECODE, [MISSING]) * (len(dates) - self.width)
+        columns = {}
+        for category in self.columns:
+            column = array(TYPECODE)
+            for row in range(self.size):
+                column.frombytes(self.row(category, row).cast("B"))
+                column.extend(padding)
+            column.extend(array(TYPECODE, [MISSING]) * ((size - self.size) * len(dates)))
+            columns[category] = column
+        return TimeSeries(dates, columns, size)
+
+    @property
+    def width(self):
+        """
+        Gets the number of dates on the axis.
+
+        :returns: The width.
+        :rtype: int
+        """
+        return len(self.dates)
+
+    @property
+    def categories(self):
+        """
+        Gets the categories held by the series.
+
+        :returns: The categories.
+        :rtype: tuple
+        """
+        return tuple(self.columns)
+
+    def span(self, start=None, end=None):
+        """
+        Gets the positions on the axis of the dates from `start` to `end` (inclusive days), found
+        by binary search.
+
+        :returns: The positions.
+        :rtype: slice
+        """
+        lower, upper = date_util.iso_bounds(start, end)
+        first = bisect.bisect_left(self.dates, lower) if lower else 0
+        last = bisect.bisect_left(self.dates, upper) if upper else self.width
+        return slice(first, max(first, last))
+
+    def period_ends(self, resolution):
+        """
+        Gets the positions on the axis of the last date of every period (week or month) of a
+        resolution.
+
+        :returns: The positions, in increasing order.
+        :rtype: tuple
+        """
+        ends = self._period_ends.get(resolution)
+        if ends is None:
+            keys = [date_util.PERIODS[resolution](date) for date in self.dates]
+            ends = self._period_ends[resolution] = tuple(
+                position
+                for position in range(self.width)
+                if position + 1 == self.width or keys[position] != keys[position + 1]
+            )
+        return ends
+
+    def derive(self, derivation):
+        """
+        Gets a series derived from the cumulative counts of the series (e.g. the new cases of
+        every day), computed for all the rows at once.
+
+        :returns: The time series.
+        :rtype: TimeSeries
+        """
+        if derivation == CUMULATIVE:
+            return self
+        derived = self._derived.get(derivation)
+        if derived is None:
+            function, typecode = DERIVATIONS[derivation]
+            columns = {}
+            for category in self.columns:
+                column = array(typecode)
+                for row in range(self.size):
+                    column.extend(function(self.row(category, row)))
+                columns[category] = column
+            derived = self._derived[derivation] = TimeSeries(
+                self.dates, columns, self.size, derivation
+            )
+        return derived
+
+    def fill(self, category, row, timeline, positions=None):
+        """
+        Writes a ``{date: amount}`` mapping into a row of a category.
+
+        :param positions: Position on the axis of every key of the timeline, for timelines not
+                          keyed by the dates of the axis. Defaults to `positions`.
+        """
+        column = self.columns[category]
+        offset = row * self.width
+        positions = positions or self.positions
+        for date, amount in timeline.items():
+            column[offset + positions[date]] = amount
+        self._latest.pop(category, None)
+        self._derived.clear()
+
+    def row(self, category, row):
+        """
+        Gets the values of a row, including missing cells.
+
+        :returns: A view into the matrix of the category.
+        :rtype: memoryview
+        """
+        offset = row * self.width
+        return self.columns[category][offset : offset + self.width]
+
+    def latest(self, category):
+        """
+        Gets the last reported value of every row of a category (0 for empty rows).
+
+        :returns: The latest values indexed by row.
+        :rtype: array
+        """
+        if category not in self._latest:
+            latest = array(self.typecode, [0]) * self.size
+            for row in range(self.size):
+                for amount in reversed(self.row(category, row)):
+                    if amount != MISSING:
+                        latest[row] = amount
+                        break
+            self._latest[category] = latest
+        return self._latest[category]
+
+    def timeline(self, category, row):
+        """
+        Gets a row of a category as a timeline.
+
+        :returns: The timeline.
+        :rtype: TimelineView
+        """
+        return TimelineView(self, category, row)
+
+
+class TimelineView:
+    """
+    A `app.models.Timeline` compatible view over a row of a `TimeSeries`.
+    """
+
+    __slots__ = ("series", "category", "row", "span", "resolution")
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, series, category, row, span=EVERY_DATE, resolution=date_util.DAILY):
+        self.series = series
+        self.category = category
+        self.row = row
+        # Positions of the viewed dates on the axis.
+        self.span = span
+        # Resolution of the view (the last value of every period is viewed above `DAILY`).
+        self.resolution = resolution
+
+    def between(self, start=None, end=None):
+        """
+        Gets a view of the timeline restricted to the days from `start` to `end` (inclusive).
+
+        :returns: The view.
+        :rtype: TimelineView
+        """
+        span = self.series.span(start, end)
+        return TimelineView(self.series, self.category, self.row, span, self.resolution)
+
+    def derive(self, derivation):
+        """
+        Gets a view of a series derived from the cumulative counts of the timeline.
+
+        :returns: The view.
+        :rtype: TimelineView
+        """
+        series = self.series.derive(derivation)
+        return TimelineView(series, self.category, self.row, self.span, self.resolution)
+
+    def resample(self, resolution):
+        """
+        Gets a view of the last value of every period (week or month) of the timeline.
+
+        :returns: The view.
+        :rtype: TimelineView
+        """
+        return TimelineView(self.series, self.category, self.row, self.span, resolution)
+
+    @property
+    def positions(self):
+        """Get the positions of the viewed dates on the axis (the ends of the periods)."""
+        viewed = range(*self.span.indices(self.series.width))
+        if self.resolution == date_util.DAILY:
+            return viewed
+
+        # The ends of the periods within the span, and the end of the span (in a period).
+        ends = self.series.period_ends(self.resolution)
+        first = bisect.bisect_left(ends, viewed.start)
+        last = bisect.bisect_left(ends, viewed.stop)
+        positions = list(ends[first:last])
+        if viewed and (not positions or positions[-1] != viewed[-1]):
+            positions.append(viewed[-1])
+        return positions
+
+    def take(self, items):
+        """
+        Gets the items (aligned with the date axis) of the viewed dates.
+
+        :returns: The items.
+        :rtype: Sequence
+        """
+        if self.resolution == date_util.DAILY:
+            return items[self.span]
+        return [items[position] for position in self.positions]
+
+    @property
+    def dates(self):
+        """Get the viewed dates."""
+        return self.take(self.series.dates)
+
+    @property
+    def values(self):
+        """Get the values of the row on the viewed dates (including missing cells)."""
+        row = self.series.row(self.category, self.row)
+        if self.resolution == date_util.DAILY:
+            return row[self.span]
+
+        # The new cases of every period, or the last value reported within it.
+        values = []
+        start = self.span.indices(self.series.width)[0]
+        for end in self.positions:
+            if self.series.derivation == NEW:
+                cells = [amount for amount in row[start : end + 1] if amount != MISSING]
+                amount = sum(cells) if cells else MISSING
+            else:
+                amount = MISSING
+                for position in range(end, start - 1, -1):
+                    if row[position] != MISSING:
+                        amount = row[position]
+                        break
+            values.append(amount)
+            start = end + 1
+        return values
+
+    @property
+    def timeline(self):
+        """Get the timeline as a `{date: amount}` dict, sorted by date."""
+        return {date: amount for date, amount in zip(self.dates, self.values) if amount != MISSING}
+
+    @property
+    def latest(self):
+        """Get latest available history value (of the last period, above `DAILY`)."""
+        if self.span == EVERY_DATE and self.resolution == date_util.DAILY:
+            return self.series.latest(self.category)[self.row]
+        for amount in reversed(self.values):
+            if amount != MISSING:
+                return amount
+        return 0
+
+    def serialize(self):
+        """
+        Serialize the timeline into a dict.
+        """
+        return {"timeline": self.timeline, "latest": self.latest}
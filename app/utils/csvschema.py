@@ -0,0 +1,77 @@
+"""app.utils.csvschema.py"""
+import operator
+
+from . import date as date_util
+
+
+class CSVSchema:
+    """
+    Layout of a CSV file, compiled once from its header row.
+
+    Splits the metadata columns from the date columns so the rows (as produced by `csv.reader`)
+    can be read by position instead of classifying every cell.
+    """
+
+    def __init__(self, header):
+        self.header = tuple(header)
+        self.width = len(self.header)
+
+        # Position of every column.
+        self.positions = {name: index for index, name in enumerate(self.header)}
+
+        # Classify the columns.
+        date_positions = [
+            index for index, name in enumerate(self.header) if date_util.is_date(name)
+        ]
+        self.dates = tuple(self.header[index] for index in date_positions)
+        self.metadata = tuple(name for name in self.header if name not in self.dates)
+
+        # Date columns are usually contiguous (e.g. JHU time series), read them with a slice.
+        if date_positions and date_positions[-1] - date_positions[0] + 1 == len(date_positions):
+            date_slice = slice(date_positions[0], date_positions[-1] + 1)
+            self._date_values = operator.itemgetter(date_slice)
+        else:
+            self._date_values = lambda row: [row[index] for index in date_positions]
+
+    @classmethod
+    async def from_rows(cls, rows):
+        """
+        Compiles the schema from the header of an asynchronous stream of rows.
+
+        The stream is left on its first data row.
+
+        :returns: The schema.
+        :rtype: CSVSchema
+        """
+        header = []
+        async for header in rows:
+            break
+        return cls(header)
+
+    def getter(self, *names):
+        """
+        Gets a callable reading the provided columns from a row.
+
+        :returns: The getter (returns a tuple when reading more than one column).
+        :rtype: operator.itemgetter
+        """
+        return operator.itemgetter(*(self.positions[name] for name in names))
+
+    def date_values(self, row):
+        """
+        Gets the values of the date columns of a row (in the order of `dates`).
+
+        :returns: The values.
+        :rtype: list
+        """
+        return self._date_values(row)
+
+    def pad(self, row):
+        """
+        Fills short rows with empty values, like `csv.DictReader` does.
+
+        :returns: The row.
+        :rtype: list
+        """
+        missing = self.width - len(row)
+        return row + [""] * missing if missing > 0 else row
@@ -1,6 +1,16 @@
 """app.utils.date.py"""
+import functools
+import sys
+from datetime import datetime, timedelta
+
 from dateutil.parser import parse
 
+# Maximum number of distinct date strings kept by `iso_date` (more than 10 years of days).
+ISO_DATE_CACHE_SIZE = 4096
+
+# Resolution of the timelines, as reported by the sources.
+DAILY = "daily"
+
 
 def is_date(string, fuzzy=False):
     """
@@ -16,3 +26,57 @@ def is_date(string, fuzzy=False):
         return True
     except ValueError:
         return False
+
+
+@functools.lru_cache(maxsize=ISO_DATE_CACHE_SIZE)
+def iso_date(string, date_format):
+    """
+    Convert a date string to an ISO 8601 timestamp (e.g. `2020-01-22T00:00:00Z`).
+
+    Every distinct string is only parsed once and the results are interned, so all the
+    timelines share the same key objects.
+
+    :param string: str, date to convert
+    :param date_format: str, `datetime.strptime` format of the date
+    """
+    return sys.intern(datetime.strptime(string, date_format).isoformat() + "Z")
+
+
+def iso_bounds(start=None, end=None):
+    """
+    Convert a range of days to bounds comparable with ISO 8601 timestamps (as strings).
+
+    :param start: datetime.date, first day of the range (None for no lower bound)
+    :param end: datetime.date, last day of the range (None for no upper bound)
+    :returns: The lower (inclusive) and upper (exclusive) bounds.
+    :rtype: tuple
+    """
+    lower = start.isoformat() if start else None
+    upper = (end + timedelta(days=1)).isoformat() if end else None
+    return lower, upper
+
+
+def iso_week(timestamp):
+    """
+    Get the ISO week of an ISO 8601 timestamp.
+
+    :param timestamp: str, timestamp (e.g. `2020-01-22T00:00:00Z`)
+    :returns: The ISO year and week number.
+    :rtype: tuple
+    """
+    return datetime.strptime(timestamp[:10], "%Y-%m-%d").isocalendar()[:2]
+
+
+def iso_month(timestamp):
+    """
+    Get the month of an ISO 8601 timestamp.
+
+    :param timestamp: str, timestamp (e.g. `2020-01-22T00:00:00Z`)
+    :returns: The month (e.g. `2020-01`).
+    :rtype: str
+    """
+    return timestamp[:7]
+
+
+# Key of the period of a timestamp, by resolution coarser than `DAILY`.
+PERIODS = {"weekly": iso_week, "monthly": iso_month}
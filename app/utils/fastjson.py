@@ -0,0 +1,178 @@
+"""app.utils.fastjson.py"""
+import json
+import weakref
+
+from ..location import TimelinedLocation
+from ..models import Location
+from ..timeseries import MISSING, TimelineView
+
+# Encoder rendering JSON like `fastapi.responses.JSONResponse`.
+ENCODER = json.JSONEncoder(ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"))
+
+# Encoded keys (``"<date>":``) of the date axis of every series.
+DATE_KEYS = weakref.WeakKeyDictionary()
+
+# Fields of the locations, in the order of `app.models.Location`.
+LOCATION_FIELDS = tuple(Location.__fields__)
+
+# Number of locations encoded in every chunk of a streamed body.
+CHUNK_LOCATIONS = 64
+
+
+def encode_latest_response(latest):
+    """
+    Encodes a body of `app.models.LatestResponse`.
+
+    :returns: The JSON body.
+    :rtype: bytes
+    """
+    return f'{{"latest":{encode_latest(latest)}}}'.encode("utf-8")
+
+
+def encode_locations_response(latest, locations, timelines=False, fields=None, **view):
+    """
+    Encodes a body of `app.models.LocationsResponse`, excluding the unset fields.
+
+    :returns: The JSON body.
+    :rtype: bytes
+    """
+    return b"".join(iter_locations_response(latest, locations, timelines, fields, **view))
+
+
+def iter_locations_response(latest, locations, timelines=False, fields=None, **view):
+    """
+    Encodes a body of `app.models.LocationsResponse` (excluding the unset fields) in chunks of
+    `CHUNK_LOCATIONS` locations, as they are streamed.
+
+    :returns: The chunks of the JSON body.
+    :rtype: Iterator[bytes]
+    """
+    yield f'{{"latest":{encode_latest(latest)},"locations":['.encode("utf-8")
+    for start in range(0, len(locations), CHUNK_LOCATIONS):
+        encoded = ",".join(
+            [
+                encode_location(location, timelines, fields=fields, **view)
+                for location in locations[start : start + CHUNK_LOCATIONS]
+            ]
+        )
+        yield f'{"," if start else ""}{encoded}'.encode("utf-8")
+    yield b"]}"
+
+
+def encode_location_response(location, timelines=False, **view):
+    """
+    Encodes a body of `app.models.LocationResponse`, including the unset fields.
+
+    :returns: The JSON body.
+    :rtype: bytes
+    """
+    encoded = encode_location(location, timelines, exclude_unset=False, **view)
+    return f'{{"location":{encoded}}}'.encode("utf-8")
+
+
+def encode_latest(latest):
+    """
+    Encodes a `app.models.Latest`.
+
+    :returns: The JSON.
+    :rtype: str
+    """
+    return (
+        f'{{"confirmed":{int(latest["confirmed"])},"deaths":{int(latest["deaths"])},'
+        f'"recovered":{int(latest["recovered"])}}}'
+    )
+
+
+# pylint: disable=too-many-branches
+def encode_location(location, timelines=False, exclude_unset=True, fields=None, **view):
+    """
+    Encodes a location as `app.models.Location`, the way `Location.serialize` does.
+
+    :param fields: Fields to encode (defaults to all of them), the others are not even read.
+    :param view: Restriction of the timelines (as `TimelinedLocation.view_timelines`).
+    :returns: The JSON.
+    :rtype: str
+    """
+    encode = ENCODER.encode
+    fields = LOCATION_FIELDS if fields is None else fields
+    members = []
+
+    if "id" in fields:
+        members.append(f'"id":{int(location.id)}')
+    if "country" in fields:
+        members.append(f'"country":{encode(str(location.country))}')
+    if "country_code" in fields:
+        members.append(f'"country_code":{encode(str(location.country_code))}')
+    if "country_population" in fields:
+        population = location.country_population
+        members.append(f'"country_population":{"null" if population is None else int(population)}')
+    if "province" in fields:
+        members.append(f'"province":{encode(str(location.province))}')
+
+    # Only county locations have a county.
+    if "county" in fields:
+        if hasattr(location, "county"):
+            members.append(f'"county":{encode(str(location.county))}')
+        elif not exclude_unset:
+            members.append('"county":""')
+
+    if "last_updated" in fields:
+        members.append(f'"last_updated":{encode(str(location.last_updated))}')
+    if "coordinates" in fields:
+        coordinates = {"latitude": location.latitude, "longitude": location.longitude}
+        members.append(f'"coordinates":{encode(coordinates)}')
+    if "latest" in fields:
+        latest = {
+            "confirmed": location.confirmed,
+            "deaths": location.deaths,
+            "recovered": location.recovered,
+        }
+        members.append(f'"latest":{encode_latest(latest)}')
+
+    if "timelines" in fields:
+        if timelines and isinstance(location, TimelinedLocation):
+            location_timelines = location.view_timelines(**view)
+            encoded = ",".join(
+                f'"{category}":{encode_timeline(location_timelines[category])}'
+                for category in ("confirmed", "deaths", "recovered")
+            )
+            members.append(f'"timelines":{{{encoded}}}')
+        elif not exclude_unset:
+            members.append('"timelines":{}')
+
+    return f'{{{",".join(members)}}}'
+
+
+def encode_timeline(timeline):
+    """
+    Encodes a timeline as `app.models.Timeline` (sorted by date, without its latest value).
+
+    Timelines viewing a `app.timeseries.TimeSeries` are encoded straight from its matrices.
+
+    :returns: The JSON.
+    :rtype: str
+    """
+    if isinstance(timeline, TimelineView):
+        keys = timeline.take(date_keys(timeline.series))
+        encoded = ",".join(
+            [key + str(amount) for key, amount in zip(keys, timeline.values) if amount != MISSING]
+        )
+        return f'{{"timeline":{{{encoded}}}}}'
+    history = {
+        str(date): amount if isinstance(amount, float) else int(amount)
+        for date, amount in sorted(timeline.timeline.items())
+    }
+    return f'{{"timeline":{ENCODER.encode(history)}}}'
+
+
+def date_keys(series):
+    """
+    Gets the encoded keys of the date axis of a series.
+
+    :returns: The keys, in the order of the axis.
+    :rtype: tuple
+    """
+    keys = DATE_KEYS.get(series)
+    if keys is None:
+        keys = DATE_KEYS[series] = tuple(f"{ENCODER.encode(date)}:" for date in series.dates)
+    return keys
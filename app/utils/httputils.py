@@ -1,5 +1,10 @@
 """app.utils.httputils.py"""
+import asyncio
+import codecs
+import csv
+import io
 import logging
+from typing import Dict, NamedTuple, Optional
 
 from aiohttp import ClientSession
 
@@ -9,6 +14,24 @@ CLIENT_SESSION: ClientSession
 
 LOGGER = logging.getLogger(__name__)
 
+# Size (in bytes) of the chunks read from streamed response bodies.
+CHUNK_SIZE = 2 ** 16
+
+# Maximum number of upstream fetches awaited concurrently by `gather`.
+MAX_CONCURRENT_FETCHES = 4
+
+
+class Validators(NamedTuple):
+    """Validators of an upstream response."""
+
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+# Validators of the last upstream response of every url (the data parsed from it is kept by
+# the caches, not here).
+VALIDATED: Dict[str, Validators] = {}
+
 
 async def setup_client_session():
     """Set up the application-global aiohttp.ClientSession instance.
@@ -28,3 +51,75 @@ async def teardown_client_session():
     global CLIENT_SESSION  # pylint: disable=global-statement
     LOGGER.info("Closing global aiohttp.ClientSession.")
     await CLIENT_SESSION.close()
+
+
+async def gather(*coroutines, limit=MAX_CONCURRENT_FETCHES):
+    """Await coroutines (e.g. upstream fetches) concurrently, at most `limit` at a time.
+
+    :returns: The results, in the order of the coroutines.
+    :rtype: list
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(bounded(coroutine) for coroutine in coroutines))
+
+
+def conditional_headers(url, current=None):
+    """Get the headers making a request conditional on the resource having changed since the
+    current data (parsed from the last validated response of the url, e.g. still cached) was
+    fetched.
+
+    :returns: The headers (empty without current data, or when nothing was validated).
+    :rtype: dict
+    """
+    headers = {}
+    validated = VALIDATED.get(url)
+    if validated and current is not None:
+        if validated.etag:
+            headers["If-None-Match"] = validated.etag
+        if validated.last_modified:
+            headers["If-Modified-Since"] = validated.last_modified
+    return headers
+
+
+def not_modified(url, response):
+    """Whether the response tells the current data of the url is still current (304)."""
+    return response.status == 304 and url in VALIDATED
+
+
+def store_validated(url, response):
+    """Store the validators of a response."""
+    VALIDATED[url] = Validators(response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+
+async def iter_csv_rows(response, chunk_size=CHUNK_SIZE):
+    """Parse the rows of a CSV response incrementally, as its body is received.
+
+    Only complete records are parsed; the (partial) last record of a chunk is kept until the
+    next chunk arrives.
+    """
+    decoder = codecs.getincrementaldecoder(response.charset or "utf-8")()
+    pending = ""
+    async for chunk in response.content.iter_chunked(chunk_size):
+        pending += decoder.decode(chunk)
+        end = _records_end(pending)
+        for row in csv.reader(io.StringIO(pending[:end], newline="")):
+            yield row
+        pending = pending[end:]
+
+    # Remaining (unterminated) record.
+    pending += decoder.decode(b"", final=True)
+    for row in csv.reader(io.StringIO(pending, newline="")):
+        yield row
+
+
+def _records_end(text):
+    """Get the position following the last line break that is not within a quoted field."""
+    end = text.rfind("\n")
+    while end != -1 and text.count('"', 0, end) % 2:
+        end = text.rfind("\n", 0, end)
+    return end + 1
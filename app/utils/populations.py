@@ -1,4 +1,5 @@
 """app.utils.populations.py"""
+import asyncio
 import json
 import logging
 
@@ -37,7 +38,7 @@ def fetch_populations(save=False):
 
         if mappings and save:
             LOGGER.info(f"Saving population data to {app.io.save(GEONAMES_BACKUP_PATH, mappings)}")
-    except (json.JSONDecodeError, KeyError, requests.exceptions.Timeout) as err:
+    except (json.JSONDecodeError, KeyError, requests.exceptions.RequestException) as err:
         LOGGER.warning(f"Error pulling population data. {err.__class__.__name__}: {err}")
         mappings = app.io.load(GEONAMES_BACKUP_PATH)
         LOGGER.info(f"Using backup data from {GEONAMES_BACKUP_PATH}")
@@ -46,8 +47,36 @@ def fetch_populations(save=False):
     return mappings
 
 
-# Mapping of alpha-2 codes country codes to population.
-POPULATIONS = fetch_populations()
+def load_populations():
+    """
+    Returns the population of each country from the bundled backup, without any network access.
+
+    :returns: The mapping of populations.
+    :rtype: dict
+    """
+    return app.io.load(GEONAMES_BACKUP_PATH)
+
+
+# Mapping of alpha-2 codes country codes to population (the bundled backup until refreshed).
+POPULATIONS = load_populations()
+
+
+async def refresh_populations():
+    """
+    Fetches the populations from the GeoNames in the background (the fetch is blocking) and swaps
+    them in. Only the locations built afterwards pick up the new values, and failures keep the
+    current ones.
+    """
+    global POPULATIONS  # pylint: disable=global-statement
+    loop = asyncio.get_event_loop()
+    try:
+        mappings = await loop.run_in_executor(None, fetch_populations)
+    except Exception:  # pylint: disable=broad-except
+        LOGGER.exception("Refreshing populations failed")
+        return
+    if mappings:
+        POPULATIONS = mappings
+
 
 # Retrieving.
 def country_population(country_code, default=None):
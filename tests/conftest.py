@@ -56,15 +56,43 @@ class DateTimeStrpTime:
         return datetime.datetime.strptime(self.date, self.strformat).isoformat()
 
 
+class FakeStreamReader:
+    """Fake instance of the `aiohttp.StreamReader` of a response body.
+    """
+
+    def __init__(self, body):
+        self.body = body
+        self.total_bytes = len(body)
+        self.position = 0
+
+    async def read(self, size=-1):
+        end = len(self.body) if size < 0 else self.position + size
+        data = self.body[self.position : end]
+        self.position += len(data)
+        return data
+
+    async def iter_chunked(self, size):
+        while self.position < len(self.body):
+            yield await self.read(size)
+
+
 class FakeRequestsGetResponse:
     """Fake instance of a response from `aiohttp.ClientSession.get`.
     """
 
+    charset = "utf-8"
+    status = 200
+    headers = {}
+
     def __init__(self, url, filename, state):
         self.url = url
         self.filename = filename
         self.state = state
 
+    @property
+    def content(self):
+        return FakeStreamReader(self.read_file(self.state).encode(self.charset))
+
     async def text(self):
         return self.read_file(self.state)
 
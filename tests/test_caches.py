@@ -0,0 +1,128 @@
+"""tests.test_caches.py"""
+import asyncio
+
+import pytest
+from asyncache import cached
+from cachetools import TTLCache
+
+from app import caches, codec, shared
+
+
+@pytest.mark.asyncio
+async def test_singleflight_coalesces_concurrent_calls():
+    calls = []
+
+    @caches.singleflight
+    async def fetch(category):
+        calls.append(category)
+        await asyncio.sleep(0.01)
+        return {"category": category}
+
+    results = await asyncio.gather(fetch("confirmed"), fetch("confirmed"), fetch("deaths"))
+
+    assert results == [{"category": "confirmed"}, {"category": "confirmed"}, {"category": "deaths"}]
+    assert results[0] is results[1]
+    assert calls == ["confirmed", "deaths"]
+
+    stats = caches.SINGLEFLIGHT_STATS[f"{fetch.__module__}.{fetch.__qualname__}"]
+    assert stats["calls"] == 2
+    assert stats["coalesced"] == 1
+
+    # Completed calls are not reused.
+    await fetch("confirmed")
+    assert calls == ["confirmed", "deaths", "confirmed"]
+
+
+@pytest.mark.asyncio
+async def test_singleflight_shares_errors():
+    @caches.singleflight
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream error")
+
+    results = await asyncio.gather(fetch(), fetch(), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_refresh_cached():
+    cache = TTLCache(maxsize=1, ttl=60)
+    values = iter(["previous", "fresh"])
+
+    @cached(cache=cache)
+    async def get_value():
+        return next(values)
+
+    assert await get_value() == "previous"
+    assert await get_value() == "previous"
+
+    assert await caches.refresh_cached(get_value, cache) == "fresh"
+    assert await get_value() == "fresh"
+
+
+@pytest.mark.asyncio
+async def test_cached_value():
+    cache = TTLCache(maxsize=2, ttl=60)
+
+    @cached(cache=cache)
+    async def get_category(category):
+        return {"category": category}
+
+    assert caches.cached_value(cache, "confirmed") is None
+    value = await get_category("confirmed")
+    assert caches.cached_value(cache, "confirmed") is value
+
+
+@pytest.mark.asyncio
+async def test_check_dataset():
+    await caches.load_dataset("test.dataset", {"latest": 1})
+    assert await caches.check_dataset("test.dataset") == ({"latest": 1}, None)
+
+    # Stored in another format.
+    await caches.load_cache("test.dataset", b'{"latest": 1}')
+    assert await caches.check_dataset("test.dataset") is None
+
+
+@pytest.mark.asyncio
+async def test_check_dataset_ingest(monkeypatch, tmp_path):
+    monkeypatch.setattr(caches, "SHARED_DATASET_DIR", str(tmp_path))
+    await caches.load_dataset("test.ingested", {"latest": 1})
+    assert await caches.check_dataset("test.ingested") == ({"latest": 1}, None)
+
+    # The ingest process ingests the dataset (and writes its file), even when cached.
+    monkeypatch.setattr(shared, "MAPPED", False)
+    assert await caches.check_dataset("test.ingested") is None
+
+
+@pytest.mark.asyncio
+async def test_check_load_caches():
+    await caches.load_caches({"test.a": b"a", "test.b": b"b"})
+
+    assert await caches.check_caches(["test.a", "test.missing", "test.b"]) == [b"a", None, b"b"]
+
+
+@pytest.mark.asyncio
+async def test_close_caches():
+    cache = caches.get_cache("test")
+    assert caches.get_cache("test") is cache
+
+    await caches.close_caches()
+    assert not caches.CACHES
+
+
+@pytest.mark.asyncio
+async def test_changed_datasets():
+    await caches.load_dataset("test.synced", {"latest": 1})
+    assert await caches.changed_datasets(["test.synced"]) == []
+
+    # Loaded by another worker.
+    blob = codec.encode({"latest": 2})
+    await caches.load_caches(
+        {"test.synced": blob, caches.version_id("test.synced"): caches.dataset_version(blob)}
+    )
+    assert await caches.changed_datasets(["test.synced", "test.missing"]) == ["test.synced"]
+
+    # Swapped in.
+    assert await caches.check_dataset("test.synced") == ({"latest": 2}, None)
+    assert await caches.changed_datasets(["test.synced"]) == []
@@ -0,0 +1,54 @@
+"""tests.test_codec.py"""
+import pytest
+
+from app import codec
+from app.timeseries import TimeSeries
+
+DATES = ["2020-01-22T00:00:00Z", "2020-01-23T00:00:00Z"]
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_roundtrip(compress):
+    series = TimeSeries.empty(DATES, ("confirmed", "deaths"), 2)
+    series.fill("confirmed", 0, {DATES[0]: 1, DATES[1]: 2})
+    series.fill("deaths", 1, {DATES[1]: 70000})
+
+    blob = codec.encode([["Washington", "Snohomish"]], series, compress)
+    metadata, decoded = codec.decode(blob)
+
+    assert metadata == [["Washington", "Snohomish"]]
+    assert decoded.dates == series.dates
+    for category in series.categories:
+        for row in range(series.size):
+            assert list(decoded.row(category, row)) == list(series.row(category, row))
+
+
+def test_decode_without_copy():
+    series = TimeSeries.empty(DATES, ("confirmed",), 1)
+    series.fill("confirmed", 0, {DATES[1]: 3})
+    blob = codec.encode([], series, compress=False)
+
+    _, decoded = codec.decode(blob, copy=False)
+
+    # A view into the blob.
+    assert decoded.columns["confirmed"].obj is blob
+    assert list(decoded.row("confirmed", 0)) == list(series.row("confirmed", 0))
+
+
+def test_roundtrip_without_series():
+    assert codec.decode(codec.encode({"latest": 1})) == ({"latest": 1}, None)
+
+
+@pytest.mark.parametrize(
+    "blob",
+    [
+        b"",
+        b'{"locations": []}',
+        codec.PREFIX.pack(codec.MAGIC, codec.VERSION + 1, True) + b"...",
+        codec.encode({"latest": 1})[:-4],
+        codec.encode([], TimeSeries.empty(DATES, ("confirmed",), 2))[:-4],
+    ],
+)
+def test_decode_error(blob):
+    with pytest.raises(codec.DecodeError):
+        codec.decode(blob)
@@ -1,5 +1,6 @@
 import pytest
 
+from app import codec
 from app.services.location import csbs
 
 
@@ -35,3 +36,15 @@ async def test_get_locations(mock_client_session):
     for d in data:
         assert d.county != "Unknown"
         assert d.county != "Unassigned"
+
+
+@pytest.mark.asyncio
+async def test_dataset_roundtrip(mock_client_session):
+    locations = await csbs.get_locations()
+
+    metadata, _ = codec.decode(codec.encode(csbs.dump_locations(locations)))
+    restored = csbs.restore_locations(metadata)
+
+    assert [location.serialize() for location in restored] == [
+        location.serialize() for location in locations
+    ]
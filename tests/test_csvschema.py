@@ -0,0 +1,38 @@
+"""tests.test_csvschema.py"""
+import pytest
+
+from app.utils.csvschema import CSVSchema
+
+JHU_HEADER = ["Province/State", "Country/Region", "Lat", "Long", "1/22/20", "1/23/20", "1/24/20"]
+
+
+def test_classify_header():
+    schema = CSVSchema(JHU_HEADER)
+
+    assert schema.metadata == ("Province/State", "Country/Region", "Lat", "Long")
+    assert schema.dates == ("1/22/20", "1/23/20", "1/24/20")
+    assert schema.positions["Country/Region"] == 1
+
+
+def test_read_by_position():
+    schema = CSVSchema(JHU_HEADER)
+    row = ["", "Thailand", "15", "101", "2", "3", "5"]
+
+    assert schema.getter("Country/Region", "Lat")(row) == ("Thailand", "15")
+    assert schema.getter("Country/Region")(row) == "Thailand"
+    assert list(schema.date_values(row)) == ["2", "3", "5"]
+
+
+def test_non_contiguous_dates():
+    schema = CSVSchema(["1/22/20", "country", "1/23/20"])
+
+    assert schema.dates == ("1/22/20", "1/23/20")
+    assert schema.date_values(["1", "Thailand", "2"]) == ["1", "2"]
+
+
+@pytest.mark.parametrize(
+    "row, expected",
+    [(["", "Thailand"], ["", "Thailand", "", "", "", "", ""]), (JHU_HEADER, JHU_HEADER),],
+)
+def test_pad(row, expected):
+    assert CSVSchema(JHU_HEADER).pad(row) == expected
@@ -21,3 +21,24 @@ def test_is_date(str_date, fuzzy_bool, expected_value):
     Testdata from https://stackoverflow.com/a/25341965/7120095
     """
     assert date.is_date(str_date, fuzzy=fuzzy_bool) is expected_value
+
+
+@pytest.mark.parametrize(
+    "str_date, date_format, expected_value",
+    [
+        ("1/22/20", "%m/%d/%y", "2020-01-22T00:00:00Z"),
+        ("2020-04-12", "%Y-%m-%d", "2020-04-12T00:00:00Z"),
+    ],
+)
+def test_iso_date(str_date, date_format, expected_value):
+    assert date.iso_date(str_date, date_format) == expected_value
+
+
+def test_iso_date_is_memoized():
+    date.iso_date.cache_clear()
+
+    first = date.iso_date("1/22/20", "%m/%d/%y")
+    # Same object, whatever string produced it.
+    assert date.iso_date("1/22/20", "%m/%d/%y") is first
+    assert date.iso_date("01/22/20", "%m/%d/%y") is first
+    assert date.iso_date.cache_info().misses == 2
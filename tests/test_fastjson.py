@@ -0,0 +1,114 @@
+import json
+from datetime import date
+from unittest import mock
+
+import pytest
+
+from app.data import DATA_SOURCES
+from app.models import LatestResponse, LocationResponse, LocationsResponse
+from app.routers import v2
+from app.utils import fastjson
+
+from . import test_jhu, test_nyt
+
+# Restrictions of the timelines.
+VIEWS = [
+    {},
+    {"start": date(2020, 3, 1), "end": date(2020, 3, 15)},
+    {"resolution": "weekly"},
+    {"start": date(2020, 2, 10), "resolution": "monthly"},
+    {"derivation": "new"},
+    {"derivation": "new", "resolution": "weekly"},
+    {"derivation": "rolling7", "end": date(2020, 3, 1)},
+    {"derivation": "growth_rate"},
+]
+
+
+@pytest.fixture(autouse=True)
+def mock_datetime():
+    """Update the locations (cached for the other tests) at the dates expected by the tests."""
+    with mock.patch("app.services.location.jhu.datetime") as jhu_datetime, mock.patch(
+        "app.services.location.nyt.datetime"
+    ) as nyt_datetime:
+        jhu_datetime.utcnow.return_value.isoformat.return_value = test_jhu.DATETIME_STRING
+        nyt_datetime.utcnow.return_value.isoformat.return_value = test_nyt.DATETIME_STRING
+        yield
+
+
+@pytest.fixture
+def fast_json_responses(monkeypatch):
+    monkeypatch.setattr(v2.SETTINGS, "fast_json_responses", True)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("source", ["jhu", "csbs", "nyt"])
+@pytest.mark.parametrize("timelines", [False, True])
+@pytest.mark.parametrize("view", VIEWS)
+async def test_encode_locations_response(mock_client_session, source, timelines, view):
+    locations = await DATA_SOURCES[source].get_all()
+    latest = {
+        "confirmed": sum(location.confirmed for location in locations),
+        "deaths": sum(location.deaths for location in locations),
+        "recovered": sum(location.recovered for location in locations),
+    }
+
+    body = fastjson.encode_locations_response(latest, locations, timelines, **view)
+    expected = v2.encode_response(
+        LocationsResponse,
+        {
+            "latest": latest,
+            "locations": [location.serialize(timelines, **view) for location in locations],
+        },
+        exclude_unset=True,
+    )
+    assert body == expected
+
+    assert fastjson.encode_latest_response(latest) == v2.encode_response(
+        LatestResponse, {"latest": latest}
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("source", ["jhu", "csbs", "nyt"])
+@pytest.mark.parametrize("timelines", [False, True])
+@pytest.mark.parametrize(
+    "fields", [None, frozenset({"id", "county", "latest"}), frozenset({"timelines", "country"})]
+)
+async def test_iter_locations_response(mock_client_session, monkeypatch, source, timelines, fields):
+    monkeypatch.setattr(fastjson, "CHUNK_LOCATIONS", 2)
+    locations = (await DATA_SOURCES[source].get_all())[:5]
+    latest = {"confirmed": 1, "deaths": 0, "recovered": 0}
+
+    chunks = list(fastjson.iter_locations_response(latest, locations, timelines, fields))
+    # The opening, 3 chunks of locations and the closing.
+    assert len(chunks) == 5
+    assert chunks == list(v2.iter_locations_response(latest, locations, timelines, fields, {}))
+    body = json.loads(b"".join(chunks))
+    assert len(body["locations"]) == len(locations)
+    assert all(
+        set(location) <= (fields or set(fastjson.LOCATION_FIELDS)) for location in body["locations"]
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("source", ["jhu", "csbs", "nyt"])
+@pytest.mark.parametrize("timelines", [False, True])
+@pytest.mark.parametrize("view", VIEWS)
+async def test_encode_location_response(mock_client_session, source, timelines, view):
+    location = await DATA_SOURCES[source].get(1)
+
+    body = fastjson.encode_location_response(location, timelines, **view)
+    expected = v2.encode_response(
+        LocationResponse, {"location": location.serialize(timelines, **view)}
+    )
+    assert body == expected
+
+
+@pytest.mark.asyncio
+async def test_fast_json_responses(
+    async_api_client, mock_client_session, fast_json_responses
+):  # pylint: disable=unused-argument
+    response = await async_api_client.get("/v2/locations/1", query_string={"source": "nyt"})
+
+    assert response.status_code == 200
+    assert response.json()["location"]["county"]
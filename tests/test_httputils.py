@@ -1,7 +1,18 @@
+import asyncio
+
 import pytest
 
 from app.utils import httputils
 
+from .conftest import FakeStreamReader
+
+CSV_TEXT = """Province/State,Country/Region,1/22/20
+,Thailand,2
+,"Korea, South",1
+"Multi
+line",Canada,5
+"""
+
 
 @pytest.mark.asyncio
 async def test_setup_teardown_client_session():
@@ -17,3 +28,78 @@ async def test_setup_teardown_client_session():
     assert httputils.CLIENT_SESSION.closed
 
     del httputils.CLIENT_SESSION
+
+
+class FakeCSVResponse:
+    charset = "utf-8"
+
+    def __init__(self, text):
+        self.content = FakeStreamReader(text.encode(self.charset))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [1, 7, 32, 2 ** 16])
+async def test_iter_csv_rows(chunk_size):
+    rows = [row async for row in httputils.iter_csv_rows(FakeCSVResponse(CSV_TEXT), chunk_size)]
+
+    assert rows == [
+        ["Province/State", "Country/Region", "1/22/20"],
+        ["", "Thailand", "2"],
+        ["", "Korea, South", "1"],
+        ["Multi\nline", "Canada", "5"],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_iter_csv_rows_unterminated():
+    rows = [row async for row in httputils.iter_csv_rows(FakeCSVResponse("a,b\n1,2"), 3)]
+
+    assert rows == [["a", "b"], ["1", "2"]]
+
+
+@pytest.mark.asyncio
+async def test_gather_is_bounded():
+    running = []
+    peak = []
+
+    async def fetch(result):
+        running.append(result)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(result)
+        return result
+
+    results = await httputils.gather(*(fetch(i) for i in range(5)), limit=2)
+
+    assert results == [0, 1, 2, 3, 4]
+    assert max(peak) == 2
+
+
+class FakeValidatedResponse:
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.headers = headers or {}
+
+
+def test_conditional_get_validators():
+    url = "https://example.com/data.csv"
+    current = ["parsed"]
+    assert httputils.conditional_headers(url, current) == {}
+
+    response = FakeValidatedResponse(
+        200, {"ETag": '"abc"', "Last-Modified": "Wed, 21 Oct 2020 07:28:00 GMT"}
+    )
+    httputils.store_validated(url, response)
+
+    assert httputils.conditional_headers(url, current) == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Wed, 21 Oct 2020 07:28:00 GMT",
+    }
+    # Only the validators are kept, the request is not conditional without current data.
+    assert httputils.VALIDATED[url] == ('"abc"', "Wed, 21 Oct 2020 07:28:00 GMT")
+    assert httputils.conditional_headers(url) == {}
+    assert not httputils.not_modified(url, FakeValidatedResponse(200))
+    assert httputils.not_modified(url, FakeValidatedResponse(304))
+
+    del httputils.VALIDATED[url]
+    assert not httputils.not_modified(url, FakeValidatedResponse(304))
@@ -1,10 +1,13 @@
+import mmap
 from unittest import mock
 
 import pytest
 
-from app import location
+from app import codec, location, shared
+from app.caches import cached_value
 from app.services.location import jhu
-from tests.conftest import mocked_strptime_isoformat
+from app.utils import httputils
+from tests.conftest import AsyncMock, asynccontextmanager, mocked_strptime_isoformat
 
 DATETIME_STRING = "2020-03-17T10:23:22.505550"
 
@@ -20,44 +23,115 @@ async def test_get_locations(mock_client_session):
     assert isinstance(output[0], location.Location)
 
     # `jhu.get_locations()` creates id based on confirmed list
-    location_confirmed = await jhu.get_category("confirmed")
+    location_confirmed, _ = await jhu.get_category("confirmed")
     assert len(output) == len(location_confirmed["locations"])
 
     # `jhu.get_locations()` creates id based on deaths list
-    location_deaths = await jhu.get_category("deaths")
+    location_deaths, _ = await jhu.get_category("deaths")
     assert len(output) == len(location_deaths["locations"])
 
     # `jhu.get_locations()` creates id based on recovered list
-    location_recovered = await jhu.get_category("recovered")
+    location_recovered, _ = await jhu.get_category("recovered")
     assert len(output) == len(location_recovered["locations"])
 
 
-@pytest.mark.parametrize(
-    "key, locations, index, expected",
-    [
-        (
-            ("Thailand", "TH"),
-            [{"country": "Thailand", "province": "TH", "history": {"test": "yes"}}],
-            0,
-            {"test": "yes"},
-        ),  # Success
-        (
-            ("Deutschland", "DE"),
-            [{"country": "Deutschland", "province": "DE", "history": {"test": "no"}}],
-            1,
-            {},
-        ),  # IndexError
-        (
-            ("US", "NJ"),
-            [{"country": "Deutschland", "province": "DE", "history": {"test": "no"}}],
-            0,
-            {},
-        ),  # Invaid Key Merge
-    ],
-)
-def test_parse_history(key, locations, index, expected):
+def test_join_rows():
     """
-    Test validating and extracting history content from
-    locations data based on index.
+    Test joining the rows of the categories on (country, province),
+    whatever the order of the rows.
     """
-    assert jhu.parse_history(key, locations, index) == expected
+    confirmed = [
+        {"country": "Thailand", "province": ""},
+        {"country": "Canada", "province": "Ontario"},
+        {"country": "Deutschland", "province": ""},
+    ]
+    deaths = [
+        {"country": "Canada", "province": "Ontario"},
+        {"country": "Thailand", "province": ""},
+        {"country": "Deutschland", "province": ""},
+    ]
+    recovered = [
+        {"country": "Canada", "province": ""},
+        {"country": "Thailand", "province": ""},
+    ]
+
+    rows, unmatched = jhu.join_rows(confirmed, {"deaths": deaths, "recovered": recovered})
+
+    assert rows == [
+        {"confirmed": 0, "deaths": 1, "recovered": 1},
+        {"confirmed": 1, "deaths": 0, "recovered": None},
+        {"confirmed": 2, "deaths": 2, "recovered": None},
+    ]
+    assert unmatched == {
+        "recovered": {("Canada", "Ontario"), ("Deutschland", ""), ("Canada", "")},
+    }
+
+
+@pytest.mark.asyncio
+async def test_category_dataset_roundtrip(mock_client_session):
+    with mock.patch("app.services.location.jhu.datetime") as mock_datetime:
+        mock_datetime.utcnow.return_value.isoformat.return_value = DATETIME_STRING
+        results = await jhu.get_category("confirmed")
+
+    restored = jhu.restore_category(*codec.decode(codec.encode(*results)))
+
+    assert restored == jhu.restore_category(*results)
+    assert list(restored["locations"][0]) == [
+        "country",
+        "country_code",
+        "province",
+        "coordinates",
+        "history",
+        "latest",
+    ]
+    assert restored["locations"][0]["history"]["1/22/20"] == 2
+
+
+@pytest.mark.asyncio
+async def test_locations_dataset_roundtrip(mock_client_session, tmp_path):
+    with mock.patch("app.services.location.jhu.datetime") as mock_datetime:
+        mock_datetime.utcnow.return_value.isoformat.return_value = DATETIME_STRING
+        mock_datetime.strptime.side_effect = mocked_strptime_isoformat
+        locations = await jhu.get_locations()
+
+    shared.write_dataset(str(tmp_path), "jhu.locations", *jhu.dump_locations(locations))
+    restored = jhu.restore_locations(*shared.read_dataset(str(tmp_path), "jhu.locations"))
+
+    assert [location.serialize(timelines=True) for location in restored] == [
+        location.serialize(timelines=True) for location in locations
+    ]
+    # The timelines are views into the mapping of the file, rather than copies.
+    series = restored[0].timelines["confirmed"].series
+    assert isinstance(series.columns["confirmed"].obj, mmap.mmap)
+
+
+class FakeNotModifiedSession:
+    """Fake client session telling every resource was not modified."""
+
+    def __init__(self):
+        self.requests = []
+
+    @asynccontextmanager
+    async def get(self, url, headers=None):
+        self.requests.append(headers)
+        yield mock.Mock(status=304)
+
+
+@pytest.mark.asyncio
+async def test_get_category_not_modified(mock_client_session, monkeypatch):
+    with mock.patch("app.services.location.jhu.datetime") as mock_datetime:
+        mock_datetime.utcnow.return_value.isoformat.return_value = DATETIME_STRING
+        current = await jhu.get_category("confirmed")
+    url = jhu.BASE_URL + "time_series_covid19_confirmed_global.csv"
+
+    session = FakeNotModifiedSession()
+    monkeypatch.setattr(httputils, "CLIENT_SESSION", session, raising=False)
+    monkeypatch.setattr(httputils, "VALIDATED", {url: httputils.Validators('"abc"', None)})
+    monkeypatch.setattr(jhu, "check_dataset", AsyncMock(return_value=None))
+    monkeypatch.setattr(jhu, "load_dataset", AsyncMock())
+
+    # The data still cached is kept.
+    refreshed = await jhu.refresh_cached(jhu.get_category, jhu.CATEGORIES_CACHE, "confirmed")
+    assert session.requests == [{"If-None-Match": '"abc"'}]
+    assert refreshed is current
+    assert cached_value(jhu.CATEGORIES_CACHE, "confirmed") is current
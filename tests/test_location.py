@@ -58,3 +58,7 @@ def test_location_class(
 
     assert location_obj.country_code == country_code
     assert location_obj.serialize() is not None
+    assert location_obj.serialize()["coordinates"] == coords.serialize()
+
+    # Compact (no instance dict).
+    assert not hasattr(location_obj, "__dict__")
@@ -3,10 +3,17 @@ from unittest import mock
 
 import pytest
 
+from app import codec
 from app.location import TimelinedLocation
 from app.location.nyt import NYTLocation
 from app.services.location import nyt
-from tests.conftest import mocked_strptime_isoformat
+from app.utils import httputils
+from tests.conftest import (
+    AsyncMock,
+    FakeStreamReader,
+    asynccontextmanager,
+    mocked_strptime_isoformat,
+)
 
 DATETIME_STRING = "2020-04-12T19:14:59.638001"
 
@@ -40,3 +47,87 @@ async def test_get_locations(mock_client_session):
 
     # translate them into python lists for ordering
     assert json.loads(expected_json_output) == json.loads(produced_json_output)
+
+
+@pytest.mark.asyncio
+async def test_dataset_roundtrip(mock_client_session):
+    with mock.patch("app.services.location.nyt.datetime") as mock_datetime:
+        mock_datetime.utcnow.return_value.isoformat.return_value = DATETIME_STRING
+        locations = await nyt.get_locations()
+
+    dataset = codec.decode(codec.encode(*nyt.dump_locations(locations)))
+    restored = nyt.restore_locations(*dataset)
+
+    assert [location.serialize(timelines=True) for location in restored] == [
+        location.serialize(timelines=True) for location in locations
+    ]
+
+
+class FakeRangeResponse:
+    charset = "utf-8"
+    headers = {}
+
+    def __init__(self, body, byte_range):
+        self.status = 200
+        if byte_range:
+            self.status = 206
+            body = body[int(byte_range[len("bytes=") : -1]) :]
+        self.content = FakeStreamReader(body)
+
+
+class FakeRangeSession:
+    """Fake client session serving a CSV body, honouring range requests."""
+
+    def __init__(self, body):
+        self.body = body
+        self.requests = []
+
+    @asynccontextmanager
+    async def get(self, url, headers=None):
+        self.requests.append(headers or {})
+        yield FakeRangeResponse(self.body, (headers or {}).get("Range"))
+
+
+with open("tests/example_data/counties.csv", "rb") as counties_file:
+    COUNTIES_CSV = counties_file.read() + b"\n"
+
+# Rows up to 2020-01-31, then the rows appended after.
+INGESTED_CSV, APPENDED_CSV = COUNTIES_CSV.split(b"2020-02-28", 1)
+APPENDED_CSV = b"2020-02-28" + APPENDED_CSV
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "appended, requests",
+    [
+        (APPENDED_CSV, 2),
+        # Rows of an ingested date, the complete data has to be ingested again.
+        (b"2020-01-21,Snohomish,Washington,53061,2,0\n", 3),
+    ],
+)
+async def test_get_locations_appended(monkeypatch, appended, requests):
+    session = FakeRangeSession(INGESTED_CSV)
+    monkeypatch.setattr(httputils, "CLIENT_SESSION", session, raising=False)
+    monkeypatch.setattr(httputils, "VALIDATED", {})
+    monkeypatch.setattr(nyt, "INGEST", {})
+    monkeypatch.setattr(nyt, "check_dataset", AsyncMock(return_value=None))
+    monkeypatch.setattr(nyt, "load_dataset", AsyncMock())
+
+    # Bypass the local cache.
+    get_locations = nyt.get_locations.__wrapped__
+
+    with mock.patch("app.services.location.nyt.datetime") as mock_datetime:
+        mock_datetime.utcnow.return_value.isoformat.return_value = DATETIME_STRING
+        await get_locations()
+
+        session.body = INGESTED_CSV + appended
+        locations = await get_locations()
+        assert session.requests[1]["Range"] == f"bytes={len(INGESTED_CSV) - 1}-"
+        assert len(session.requests) == requests
+
+        nyt.INGEST.clear()
+        expected = await get_locations()
+
+    assert [location.serialize(timelines=True) for location in locations] == [
+        location.serialize(timelines=True) for location in expected
+    ]
@@ -69,9 +69,42 @@ SAMPLE_GEONAMES_JSON = {
         (NOT_FOUND_HTML, None),
         (None, {"foo": "bar"}),
         (requests.exceptions.Timeout("Forced Timeout"), None),
+        (requests.exceptions.ConnectionError("Forced Connection Error"), None),
     ],
 )
 def test_fetch_populations(body_arg, json_arg):
     responses.add(responses.GET, app.utils.populations.GEONAMES_URL, body=body_arg, json=json_arg)
 
     assert app.utils.populations.fetch_populations()
+
+
+def test_load_populations():
+    # Read from the bundled backup, without fetching.
+    assert app.utils.populations.load_populations() == app.io.load(
+        app.utils.populations.GEONAMES_BACKUP_PATH
+    )
+    assert app.utils.populations.country_population("AD") == 77006
+
+
+@pytest.mark.asyncio
+async def test_refresh_populations(monkeypatch):
+    monkeypatch.setattr(app.utils.populations, "POPULATIONS", {"AD": 1})
+    monkeypatch.setattr(app.utils.populations, "fetch_populations", lambda: {"AD": 77006})
+
+    await app.utils.populations.refresh_populations()
+
+    assert app.utils.populations.country_population("AD") == 77006
+
+
+@pytest.mark.asyncio
+async def test_refresh_populations_failed(monkeypatch, caplog):
+    def fetch_populations():
+        raise OSError("Forced Error")
+
+    monkeypatch.setattr(app.utils.populations, "POPULATIONS", {"AD": 1})
+    monkeypatch.setattr(app.utils.populations, "fetch_populations", fetch_populations)
+
+    await app.utils.populations.refresh_populations()
+
+    assert app.utils.populations.country_population("AD") == 1
+    assert "Refreshing populations failed" in caplog.text
@@ -6,7 +6,11 @@ from unittest import mock
 import pytest
 from async_asgi_testclient import TestClient
 
+from app import scheduler
+from app.data import DATA_SOURCES
 from app.main import APP
+from app.routers import v2
+from app.utils import date
 
 from .conftest import mocked_strptime_isoformat
 from .test_jhu import DATETIME_STRING
@@ -186,3 +190,174 @@ async def test_latest(async_api_client, query_params, mock_client_session):
     assert response.status_code == 200
     assert response_json["latest"]["confirmed"]
     assert response_json["latest"]["deaths"]
+
+
+@pytest.mark.asyncio
+async def test_locations_response_cache(async_api_client, mock_client_session):
+    query_params = {"source": "nyt", "timelines": True, "County": "Snohomish"}
+    response = await async_api_client.get("/v2/locations", query_string=query_params)
+
+    snapshot = await DATA_SOURCES["nyt"].get_snapshot()
+    cache_key = (True, None, None, "daily", "cumulative", None, 0, None, (("county", "snohomish"),))
+    assert json.loads(snapshot.responses[cache_key]) == response.json()
+
+    cached_response = await async_api_client.get("/v2/locations", query_string=query_params)
+    assert cached_response.json() == response.json()
+
+    # Filters on attributes the locations do not have do not make other responses.
+    cached = set(snapshot.responses)
+    ignored_params = {**query_params, "foo": "1", "latitude": "15"}
+    ignored_response = await async_api_client.get("/v2/locations", query_string=ignored_params)
+    assert ignored_response.json() == response.json()
+    assert set(snapshot.responses) == cached
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ready, expected_status", [(False, 503), (True, 200)])
+async def test_ready(async_api_client, monkeypatch, ready, expected_status):
+    monkeypatch.setattr(scheduler, "READY", ready)
+    response = await async_api_client.get("/ready")
+
+    assert response.status_code == expected_status
+    assert response.json() == {"ready": ready}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("source", ["jhu", "nyt"])
+@pytest.mark.parametrize("fast_json_responses", [False, True])
+async def test_location_date_range(
+    async_api_client, mock_client_session, monkeypatch, source, fast_json_responses
+):
+    monkeypatch.setattr(v2.SETTINGS, "fast_json_responses", fast_json_responses)
+    query_params = {"source": source, "from": "2020-01-25", "to": "2020-01-28"}
+    response = await async_api_client.get("/v2/locations/1", query_string=query_params)
+
+    assert response.status_code == 200
+    dates = list(response.json()["location"]["timelines"]["confirmed"]["timeline"])
+    assert dates[0].startswith("2020-01-25") and dates[-1].startswith("2020-01-28")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fast_json_responses", [False, True])
+async def test_locations_resolution(
+    async_api_client, mock_client_session, monkeypatch, fast_json_responses
+):
+    monkeypatch.setattr(v2.SETTINGS, "fast_json_responses", fast_json_responses)
+    query_params = {"source": "jhu", "timelines": True, "resolution": "weekly"}
+    response = await async_api_client.get("/v2/locations", query_string=query_params)
+
+    assert response.status_code == 200
+    timeline = response.json()["locations"][0]["timelines"]["confirmed"]["timeline"]
+    daily_timeline = (await DATA_SOURCES["jhu"].get(0)).timelines["confirmed"].timeline
+    # A value per week, the last one of the week.
+    weeks = [date.iso_week(day) for day in timeline]
+    assert len(weeks) == len(set(weeks)) == len(set(map(date.iso_week, daily_timeline)))
+    assert list(timeline.items())[-1] == list(daily_timeline.items())[-1]
+
+
+@pytest.mark.asyncio
+async def test_locations_invalid_resolution(async_api_client, mock_client_session):
+    query_params = {"source": "jhu", "resolution": "hourly"}
+    response = await async_api_client.get("/v2/locations/0", query_string=query_params)
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fast_json_responses", [False, True])
+async def test_location_derived_series(
+    async_api_client, mock_client_session, monkeypatch, fast_json_responses
+):
+    monkeypatch.setattr(v2.SETTINGS, "fast_json_responses", fast_json_responses)
+    query_params = {"source": "jhu", "series": "new"}
+    response = await async_api_client.get("/v2/locations/0", query_string=query_params)
+
+    assert response.status_code == 200
+    location = response.json()["location"]
+    # The daily new cases add up to the latest count.
+    assert sum(location["timelines"]["confirmed"]["timeline"].values()) == (
+        location["latest"]["confirmed"]
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fast_json_responses", [False, True])
+async def test_locations_pagination(
+    async_api_client, mock_client_session, monkeypatch, fast_json_responses
+):
+    monkeypatch.setattr(v2.SETTINGS, "fast_json_responses", fast_json_responses)
+    everything = (await async_api_client.get("/v2/locations")).json()
+
+    query_params = {"limit": 3, "offset": 2, "fields": "id,latest"}
+    response = await async_api_client.get("/v2/locations", query_string=query_params)
+
+    assert response.status_code == 200
+    page = response.json()
+    # The latest amounts of every location, and the requested fields of the page.
+    assert page["latest"] == everything["latest"]
+    assert page["locations"] == [
+        {"id": location["id"], "latest": location["latest"]}
+        for location in everything["locations"][2:5]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_locations_unknown_fields(async_api_client, mock_client_session):
+    response = await async_api_client.get("/v2/locations", query_string={"fields": "id,foo"})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "fields, expected",
+    [("id,", {"id"}), ("id,,latest", {"id", "latest"}), ("", None), (" , ", None)],
+)
+async def test_locations_empty_fields(async_api_client, mock_client_session, fields, expected):
+    response = await async_api_client.get("/v2/locations", query_string={"fields": fields})
+
+    # Empty names are skipped, every field is encoded when none is named.
+    assert response.status_code == 200
+    location = response.json()["locations"][0]
+    assert set(location) == (expected or set(location) | {"id", "country", "latest"})
+
+
+@pytest.mark.asyncio
+async def test_locations_cached_by_cells(async_api_client, mock_client_session, monkeypatch):
+    snapshot = await DATA_SOURCES["jhu"].get_snapshot()
+    monthly = {"start": None, "end": None, "resolution": "monthly", "derivation": "cumulative"}
+    monkeypatch.setattr(v2, "MAX_CACHED_CELLS", v2.timeline_cells(snapshot.locations, monthly))
+
+    # The narrower view of the same locations is cached, the wider one is streamed.
+    for resolution, cached in [("monthly", True), ("daily", False)]:
+        query_params = {"source": "jhu", "timelines": True, "resolution": resolution}
+        cache_key = (True, None, None, resolution, "cumulative", None, 0, None, ())
+        snapshot.responses.pop(cache_key, None)
+        response = await async_api_client.get("/v2/locations", query_string=query_params)
+        assert response.status_code == 200
+        assert (cache_key in snapshot.responses) == cached
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fast_json_responses", [False, True])
+async def test_locations_streamed(
+    async_api_client, mock_client_session, monkeypatch, fast_json_responses
+):
+    monkeypatch.setattr(v2.SETTINGS, "fast_json_responses", fast_json_responses)
+    query_params = {"source": "nyt", "timelines": True, "limit": 10}
+    snapshot = await DATA_SOURCES["nyt"].get_snapshot()
+    cache_key = (True, None, None, "daily", "cumulative", 10, 0, None, ())
+    snapshot.responses.pop(cache_key, None)
+
+    view = {"start": None, "end": None, "resolution": "daily", "derivation": "cumulative"}
+    cells = v2.timeline_cells(snapshot.locations[:10], view)
+
+    monkeypatch.setattr(v2, "MAX_CACHED_CELLS", cells - 1)
+    streamed = await async_api_client.get("/v2/locations", query_string=query_params)
+    assert cache_key not in snapshot.responses
+
+    monkeypatch.setattr(v2, "MAX_CACHED_CELLS", cells)
+    cached = await async_api_client.get("/v2/locations", query_string=query_params)
+    assert cache_key in snapshot.responses
+
+    assert streamed.json() == cached.json()
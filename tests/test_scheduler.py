@@ -0,0 +1,88 @@
+"""tests.test_scheduler.py"""
+import asyncio
+
+import pytest
+
+from app import scheduler
+
+from .conftest import AsyncMock
+
+
+class FakeService:
+    def __init__(self, fail=False, data_ids=()):
+        self.fail = fail
+        self.data_ids = data_ids
+        self.refreshes = 0
+        self.snapshots = 0
+
+    async def refresh(self):
+        self.refreshes += 1
+        if self.fail:
+            raise ValueError("upstream error")
+
+    async def get_snapshot(self):
+        self.snapshots += 1
+        if self.fail:
+            raise ValueError("upstream error")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fail", [False, True])
+async def test_refresh_forever(fail):
+    service = FakeService(fail)
+    task = asyncio.ensure_future(scheduler.refresh_forever("fake", service, 0.01, 0.005))
+
+    await asyncio.sleep(0.1)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    # Keeps refreshing, even after failures.
+    assert service.refreshes > 1
+    assert service.snapshots == (0 if fail else service.refreshes)
+
+
+@pytest.mark.asyncio
+async def test_warm_up(monkeypatch):
+    monkeypatch.setattr(scheduler, "READY", False)
+    loaded, failing = FakeService(), FakeService(fail=True)
+    task = asyncio.ensure_future(scheduler.warm_up({"loaded": loaded, "failing": failing}, 0.01))
+
+    await asyncio.sleep(0.05)
+    # Not ready until every snapshot is loaded, the failed ones are retried.
+    assert not scheduler.READY
+    assert failing.snapshots > 1
+
+    failing.fail = False
+    await asyncio.wait_for(task, 1)
+    assert scheduler.READY
+    assert loaded.snapshots == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("refresh_populations", [False, True])
+async def test_start_stop_refresh_scheduler(monkeypatch, refresh_populations):
+    monkeypatch.setattr(scheduler.SETTINGS, "refresh_populations", refresh_populations)
+    monkeypatch.setattr(scheduler.populations, "refresh_populations", AsyncMock())
+    monkeypatch.setattr(scheduler, "warm_up", AsyncMock())
+
+    await scheduler.start_refresh_scheduler()
+    # A refresh task per data-source, the warm-up and sync tasks and the populations refresh.
+    assert len(scheduler.TASKS) == len(scheduler.DATA_SOURCES) + 2 + refresh_populations
+
+    await scheduler.stop_refresh_scheduler()
+    assert not scheduler.TASKS
+
+
+@pytest.mark.asyncio
+async def test_sync_datasets(monkeypatch):
+    changed = FakeService(data_ids=("fake.confirmed", "fake.deaths"))
+    unchanged = FakeService(data_ids=("other.locations",))
+    changed_datasets = AsyncMock(return_value=["fake.deaths"])
+    monkeypatch.setattr(scheduler.caches, "changed_datasets", changed_datasets)
+
+    await scheduler.sync_datasets({"fake": changed, "other": unchanged})
+
+    # The versions are checked at once.
+    changed_datasets.assert_awaited_once_with(["fake.confirmed", "fake.deaths", "other.locations"])
+    assert (changed.refreshes, changed.snapshots) == (1, 1)
+    assert (unchanged.refreshes, unchanged.snapshots) == (0, 0)
@@ -0,0 +1,36 @@
+"""tests.test_shared.py"""
+import mmap
+
+from app import shared
+from app.timeseries import TimeSeries
+
+DATES = ["2020-01-22T00:00:00Z", "2020-01-23T00:00:00Z"]
+
+
+def test_write_read_dataset(tmp_path):
+    series = TimeSeries.empty(DATES, ("confirmed", "deaths"), 2)
+    series.fill("confirmed", 1, {DATES[0]: 1, DATES[1]: 4})
+    shared.write_dataset(str(tmp_path), "test.locations", [["Washington", "King"]], series)
+
+    metadata, mapped = shared.read_dataset(str(tmp_path), "test.locations")
+
+    assert metadata == [["Washington", "King"]]
+    assert mapped.timeline("confirmed", 1).timeline == {DATES[0]: 1, DATES[1]: 4}
+    # Zero-copy views into the read-only mapping of the file.
+    assert isinstance(mapped.columns["confirmed"].obj, mmap.mmap)
+    assert mapped.columns["confirmed"].readonly
+
+
+def test_read_missing_dataset(tmp_path):
+    assert shared.read_dataset(str(tmp_path), "test.missing") is None
+
+
+def test_changed_datasets(tmp_path):
+    directory = str(tmp_path)
+    assert shared.changed_datasets(directory, ["test.locations"]) == []
+
+    shared.write_dataset(directory, "test.locations", [])
+    assert shared.changed_datasets(directory, ["test.locations"]) == ["test.locations"]
+
+    shared.read_dataset(directory, "test.locations")
+    assert shared.changed_datasets(directory, ["test.locations"]) == []
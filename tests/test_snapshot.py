@@ -0,0 +1,123 @@
+import pytest
+
+from app import snapshot as snapshot_module
+from app.services.location import LocationService
+from app.snapshot import Snapshot
+
+
+class FakeLocationService(LocationService):
+    def __init__(self):
+        self.locations = []
+
+    async def get_all(self):
+        return self.locations
+
+    async def get(self, id):  # pylint: disable=redefined-builtin,invalid-name
+        return self.locations[id]
+
+    async def refresh(self):
+        self.locations = []
+
+
+@pytest.mark.asyncio
+async def test_get_snapshot():
+    service = FakeLocationService()
+
+    snapshot = await service.get_snapshot()
+    snapshot.responses["key"] = b"{}"
+    assert await service.get_snapshot() is snapshot
+
+    # Swapping the locations invalidates the snapshot.
+    await service.refresh()
+    swapped = await service.get_snapshot()
+
+    assert swapped is not snapshot
+    assert swapped.version > snapshot.version
+    assert "key" not in swapped.responses
+
+
+def test_cache_response(monkeypatch):
+    monkeypatch.setattr(snapshot_module, "RESPONSE_CACHE_SIZE", 4)
+    snapshot = Snapshot([])
+
+    snapshot.cache_response("a", b"{}")
+    snapshot.cache_response("b", b"[]")
+    snapshot.cache_response("large", b"[{}]{}")
+    assert list(snapshot.responses) == ["a", "b"]
+
+    # Bounded by the size of the bodies, the least recently used are evicted.
+    snapshot.cache_response("c", b"{}")
+    assert list(snapshot.responses) == ["b", "c"]
+
+
+class FakeLocation:
+    def __init__(self, country_code, county=None, confirmed=0):
+        self.country = self.country_code = country_code
+        self.confirmed = confirmed
+        self.deaths = self.recovered = 0
+        if county:
+            self.county = county
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        ((), [0, 1, 2]),
+        ((("country_code", "us"),), [0, 2]),
+        ((("country_code", "us"), ("county", "king")), [2]),
+        ((("country_code", "de"), ("county", "king")), []),
+        # Not indexed, compared location by location.
+        ((("country", "de"),), [1]),
+        ((("country", "us"), ("county", "king")), [2]),
+    ],
+)
+def test_filter(filters, expected):
+    locations = [
+        FakeLocation("US", "Snohomish"),
+        FakeLocation("DE", "Berlin"),
+        FakeLocation("US", "King"),
+    ]
+    snapshot = Snapshot(locations)
+
+    assert snapshot.filter(filters) == [locations[position] for position in expected]
+
+
+def test_filter_missing_attribute():
+    locations = [FakeLocation("US"), FakeLocation("DE")]
+    snapshot = Snapshot(locations)
+
+    assert "county" not in snapshot.indexes
+    assert snapshot.filter((("county", "king"),)) == locations
+    assert snapshot.normalize((("country", "us"), ("county", "king"))) == (("country", "us"),)
+
+
+def test_filter_coordinates():
+    locations = [FakeLocation("US"), FakeLocation("DE")]
+    locations[0].latitude = "15"
+    snapshot = Snapshot(locations)
+
+    # The coordinates are not filtered on.
+    assert snapshot.filter((("latitude", "15"),)) == locations
+    assert snapshot.normalize((("latitude", "15"),)) == ()
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        ((), 7),
+        ((("country_code", "us"),), 5),
+        ((("country_code", "us"), ("county", "king")), 4),
+        ((("country", "de"),), 2),
+    ],
+)
+def test_latest_of(filters, expected):
+    snapshot = Snapshot(
+        [
+            FakeLocation("US", "Snohomish", 1),
+            FakeLocation("DE", "Berlin", 2),
+            FakeLocation("US", "King", 4),
+        ]
+    )
+
+    latest = snapshot.latest_of(filters, snapshot.filter(filters))
+    assert latest == {"confirmed": expected, "deaths": 0, "recovered": 0}
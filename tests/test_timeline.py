@@ -1,4 +1,5 @@
 from collections import OrderedDict
+from datetime import date
 from unittest import mock
 
 import pytest
@@ -35,3 +36,73 @@ def test_timeline_class():
     }
 
     assert dict(history_data.serialize()) == check_serialize
+
+
+def test_timeline_between():
+    timeline = models.Timeline(
+        timeline={"2020-01-22T00:00:00Z": 2, "2020-01-23T00:00:00Z": 3, "2020-01-24T00:00:00Z": 5,}
+    )
+
+    assert timeline.between(date(2020, 1, 23)).timeline == {
+        "2020-01-23T00:00:00Z": 3,
+        "2020-01-24T00:00:00Z": 5,
+    }
+    assert timeline.between(end=date(2020, 1, 22)).serialize() == {
+        "timeline": {"2020-01-22T00:00:00Z": 2},
+        "latest": 2,
+    }
+
+
+@pytest.mark.parametrize(
+    "resolution, expected",
+    [
+        (
+            "daily",
+            {"2020-01-31T00:00:00Z": 2, "2020-02-01T00:00:00Z": 3, "2020-02-03T00:00:00Z": 7},
+        ),
+        ("weekly", {"2020-02-01T00:00:00Z": 3, "2020-02-03T00:00:00Z": 7}),
+        ("monthly", {"2020-01-31T00:00:00Z": 2, "2020-02-03T00:00:00Z": 7}),
+    ],
+)
+def test_timeline_resample(resolution, expected):
+    timeline = models.Timeline(
+        timeline={"2020-02-03T00:00:00Z": 7, "2020-01-31T00:00:00Z": 2, "2020-02-01T00:00:00Z": 3}
+    )
+
+    assert timeline.resample(resolution).timeline == expected
+
+
+def test_timeline_derive():
+    timeline = models.Timeline(
+        timeline={"2020-01-22T00:00:00Z": 2, "2020-01-23T00:00:00Z": 3, "2020-01-24T00:00:00Z": 6}
+    )
+
+    assert timeline.derive("cumulative") is timeline
+    assert timeline.derive("new").timeline == {
+        "2020-01-22T00:00:00Z": 2,
+        "2020-01-23T00:00:00Z": 1,
+        "2020-01-24T00:00:00Z": 3,
+    }
+    assert timeline.derive("growth_rate").serialize() == {
+        "timeline": {"2020-01-23T00:00:00Z": 0.5, "2020-01-24T00:00:00Z": 1.0},
+        "latest": 1.0,
+    }
+
+
+@pytest.mark.parametrize(
+    "resolution, expected",
+    [
+        ("weekly", {"2020-01-26T00:00:00Z": 3, "2020-01-28T00:00:00Z": 3}),
+        ("monthly", {"2020-01-28T00:00:00Z": 6}),
+    ],
+)
+def test_timeline_resample_new(resolution, expected):
+    timeline = models.Timeline(
+        timeline={"2020-01-22T00:00:00Z": 2, "2020-01-26T00:00:00Z": 3, "2020-01-28T00:00:00Z": 6}
+    )
+
+    resampled = timeline.derive("new").between(end=date(2020, 1, 28)).resample(resolution)
+
+    # The new cases of every period.
+    assert resampled.timeline == expected
+    assert resampled.latest == list(expected.values())[-1]
@@ -0,0 +1,176 @@
+"""tests.test_timeseries.py"""
+from datetime import date
+
+import pytest
+
+from app import models, timeseries
+
+MISSING = timeseries.MISSING
+
+DATES = ["2020-01-22T00:00:00Z", "2020-01-23T00:00:00Z", "2020-01-24T00:00:00Z"]
+
+
+@pytest.fixture
+def series():
+    series = timeseries.TimeSeries.empty(DATES, ("confirmed", "deaths"), 3)
+    series.fill("confirmed", 0, {DATES[0]: 1, DATES[1]: 2, DATES[2]: 5})
+    series.fill("confirmed", 1, {DATES[1]: 3, DATES[2]: 4})
+    series.fill("deaths", 0, {DATES[2]: 1})
+    return series
+
+
+def test_row_is_view(series):
+    row = series.row("confirmed", 0)
+
+    assert isinstance(row, memoryview)
+    assert list(row) == [1, 2, 5]
+    assert row.obj is series.columns["confirmed"].obj
+
+
+def test_latest(series):
+    assert list(series.latest("confirmed")) == [5, 4, 0]
+    assert list(series.latest("deaths")) == [1, 0, 0]
+    assert sum(series.latest("confirmed")) == 9
+
+
+def test_latest_is_reset_by_fill(series):
+    assert sum(series.latest("deaths")) == 1
+
+    series.fill("deaths", 1, {DATES[0]: 7})
+    assert sum(series.latest("deaths")) == 8
+
+
+def test_extend(series):
+    extended = series.extend(["2020-01-25T00:00:00Z"], 4)
+    extended.fill("confirmed", 0, {"2020-01-25T00:00:00Z": 8})
+    extended.fill("confirmed", 3, {"2020-01-25T00:00:00Z": 1})
+
+    assert extended.width == 4
+    assert list(extended.latest("confirmed")) == [8, 4, 0, 1]
+    assert extended.timeline("confirmed", 1).timeline == {DATES[1]: 3, DATES[2]: 4}
+    assert extended.timeline("deaths", 0).timeline == {DATES[2]: 1}
+    # The original series is left as is.
+    assert list(series.latest("confirmed")) == [5, 4, 0]
+
+
+@pytest.mark.parametrize(
+    "start, end, expected",
+    [
+        (None, None, slice(0, 3)),
+        (date(2020, 1, 23), None, slice(1, 3)),
+        (None, date(2020, 1, 23), slice(0, 2)),
+        (date(2020, 1, 23), date(2020, 1, 23), slice(1, 2)),
+        (date(2020, 2, 1), None, slice(3, 3)),
+        (date(2020, 1, 24), date(2020, 1, 22), slice(2, 2)),
+    ],
+)
+def test_span(series, start, end, expected):
+    assert series.span(start, end) == expected
+
+
+def test_timeline_view_between(series):
+    view = series.timeline("confirmed", 0).between(date(2020, 1, 22), date(2020, 1, 23))
+
+    assert view.timeline == {DATES[0]: 1, DATES[1]: 2}
+    assert view.latest == 2
+    assert view.values.obj is series.columns["confirmed"].obj
+    assert series.timeline("deaths", 0).between(end=date(2020, 1, 23)).latest == 0
+
+
+@pytest.fixture
+def daily_series():
+    # Thursday 2020-01-30 to Monday 2020-02-03.
+    dates = [f"2020-{day}T00:00:00Z" for day in ("01-30", "01-31", "02-01", "02-02", "02-03")]
+    series = timeseries.TimeSeries.empty(dates, ("confirmed",), 1)
+    series.fill("confirmed", 0, {dates[0]: 1, dates[1]: 2, dates[3]: 4})
+    return series
+
+
+@pytest.mark.parametrize(
+    "resolution, expected", [("weekly", (3, 4)), ("monthly", (1, 4))],
+)
+def test_period_ends(daily_series, resolution, expected):
+    assert daily_series.period_ends(resolution) == expected
+
+
+@pytest.mark.parametrize(
+    "resolution, start, expected",
+    [
+        ("weekly", None, {"2020-02-02T00:00:00Z": 4}),
+        ("monthly", None, {"2020-01-31T00:00:00Z": 2, "2020-02-03T00:00:00Z": 4}),
+        # The last value reported within the viewed days of the period.
+        ("monthly", date(2020, 2, 1), {"2020-02-03T00:00:00Z": 4}),
+        ("daily", date(2020, 2, 1), {"2020-02-02T00:00:00Z": 4}),
+    ],
+)
+def test_timeline_view_resample(daily_series, resolution, start, expected):
+    view = daily_series.timeline("confirmed", 0).between(start).resample(resolution)
+
+    assert view.timeline == expected
+    assert view.latest == 4
+
+
+@pytest.mark.parametrize(
+    "function, expected",
+    [
+        (timeseries.new_cases, [MISSING, 2, 0, MISSING, 1, 5, 0, 0, 0, 2]),
+        (
+            timeseries.rolling_average,
+            [MISSING, 0.29, 0.29, MISSING, 0.43, 1.14, 1.14, 1.14, 0.86, 1.14],
+        ),
+        (
+            timeseries.growth_rate,
+            [MISSING, MISSING, 0.0, MISSING, 0.5, 1.6667, 0.0, 0.0, 0.0, 0.25],
+        ),
+    ],
+)
+def test_derivations(function, expected):
+    values = [MISSING, 2, 2, MISSING, 3, 8, 8, 8, 8, 10]
+
+    assert function(values) == expected
+
+
+def test_derive(series):
+    new = series.derive(timeseries.NEW)
+
+    assert new.derivation == timeseries.NEW
+    assert new.timeline("confirmed", 0).timeline == {DATES[0]: 1, DATES[1]: 1, DATES[2]: 3}
+    assert new.timeline("confirmed", 1).timeline == {DATES[1]: 3, DATES[2]: 1}
+    # Computed once for all the rows, until the series is filled again.
+    assert series.derive(timeseries.NEW) is new
+    series.fill("confirmed", 2, {DATES[0]: 1})
+    assert series.derive(timeseries.NEW) is not new
+
+    rates = series.derive(timeseries.GROWTH_RATE)
+    assert rates.typecode == "d"
+    assert rates.timeline("confirmed", 0).timeline == {DATES[1]: 1.0, DATES[2]: 1.5}
+    assert series.derive(timeseries.CUMULATIVE) is series
+
+
+def test_resample_new_cases(daily_series):
+    view = daily_series.timeline("confirmed", 0).derive(timeseries.NEW).resample("weekly")
+
+    # The new cases of every week.
+    assert view.timeline == {"2020-02-02T00:00:00Z": 4}
+    assert view.latest == 4
+
+    # As for a plain timeline.
+    timeline = models.Timeline(timeline=daily_series.timeline("confirmed", 0).timeline)
+    assert timeline.derive(timeseries.NEW).resample("weekly").serialize() == view.serialize()
+
+
+@pytest.mark.parametrize(
+    "category, row, expected",
+    [
+        ("confirmed", 0, {DATES[0]: 1, DATES[1]: 2, DATES[2]: 5}),
+        ("confirmed", 1, {DATES[1]: 3, DATES[2]: 4}),
+        ("confirmed", 2, {}),
+        ("deaths", 0, {DATES[2]: 1}),
+    ],
+)
+def test_timeline_view(series, category, row, expected):
+    view = series.timeline(category, row)
+
+    assert view.timeline == expected
+    assert view.latest == (list(expected.values())[-1] if expected else 0)
+    assert view.serialize() == {"timeline": expected, "latest": view.latest}